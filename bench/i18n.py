@@ -0,0 +1,81 @@
+# -*- coding: utf-8; fill-column: 78 -*-
+"""Translation lookups for a form that produces many errors.
+
+Usage::
+
+  python bench/i18n.py [rows]
+
+Validates a List of Dict whose every leaf fails, with the translation
+functions placed on the root as recommended, and reports the time spent
+validating and the time spent finding ``ugettext`` for each failing
+element, by searching each element's ancestry and through the memoized
+lookup the validators use.
+
+"""
+import sys
+import timeit
+from operator import attrgetter
+
+from flatland import Dict, Integer, List, String
+from flatland.schema.util import cached_i18n_function, find_i18n_function
+from flatland.validation import Present, ValueAtLeast
+
+
+def ugettext(text):
+    return text
+
+
+def ungettext(single, plural, n):
+    return single if n == 1 else plural
+
+
+Row = Dict.of(String.named(u'name').using(validators=[Present()]),
+              String.named(u'email').using(validators=[Present()]),
+              Integer.named(u'age').using(validators=[ValueAtLeast(
+                  minimum=18)]))
+
+Rows = List.named(u'rows').using(ugettext=ugettext, ungettext=ungettext).of(
+    Row)
+
+
+def build(rows):
+    return Rows([{u'name': u'', u'email': u'', u'age': 1}] * rows)
+
+
+def measure(rows, repeat=3):
+    root = build(rows)
+    root.validate()
+    failing = [element for element in root.all_children if element.errors]
+    finder = attrgetter('ugettext')
+
+    def search():
+        for element in failing:
+            find_i18n_function(element, finder)
+
+    def cached():
+        for element in failing:
+            cached_i18n_function(element, 'ugettext')
+
+    def validate():
+        fresh = build(rows)
+        start = timeit.default_timer()
+        fresh.validate()
+        return timeit.default_timer() - start
+
+    timings = [(label, min(timeit.repeat(function, number=1, repeat=repeat)))
+               for label, function in (('search', search), ('cached', cached))]
+    timings.append(('validate', min(validate() for _ in xrange(repeat))))
+    return len(failing), timings
+
+
+def main(argv):
+    rows = int(argv[1]) if len(argv) > 1 else 2000
+    errors, timings = measure(rows)
+    print '%d errors' % errors
+    for label, seconds in timings:
+        print '%-10s %8.4f s %8.2f us/error' % (
+            label, seconds, seconds * 1e6 / errors)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8; fill-column: 78 -*-
+"""Tag rendering and its per-attribute helpers.
+
+Usage::
+
+  python bench/markup.py [fields]
+
+Times the helpers run for every attribute of every tag, next to the
+straightforward versions they replace: attribute escaping by chained
+``replace()``, attribute ordering by ``list.index`` and uncached keyword
+decoding.  Then renders a form of *fields* text inputs one tag at a time,
+with :meth:`Generator.render` and with :meth:`Generator.stream`.
+
+"""
+import sys
+import timeit
+
+from flatland import Dict, List, String
+from flatland.out.markup import (
+    Generator,
+    _attribute_escape,
+    _attribute_sort_key,
+    _static_attribute_order,
+    _unicode_keyed,
+    )
+
+
+def chained_escape(string):
+    return string. \
+           replace(u'&', u'&amp;'). \
+           replace(u'<', u'&lt;'). \
+           replace(u'>', u'&gt;'). \
+           replace(u'"', u'&quot;')
+
+
+def indexed_sort_key(item):
+    try:
+        return (0, _static_attribute_order.index(item[0]))
+    except ValueError:
+        return (1, item[0])
+
+
+def decoded(bytestring_keyed):
+    return dict((key.rstrip('_').decode('ascii'), value)
+                for key, value in bytestring_keyed.items())
+
+
+VALUES = [u'text', u'rows_12_email', u'someone@example.com',
+          u'Fish & Chips', u'<b>"quoted"</b>']
+ATTRIBUTES = [(u'id', 1), (u'value', 2), (u'class', 3), (u'type', 4),
+              (u'name', 5), (u'tabindex', 6)]
+KEYWORDS = {'type': u'text', 'class_': u'wide', 'size': u'40'}
+
+
+def helpers(number=20000, repeat=3):
+    cases = [
+        ('escape chained', lambda: [chained_escape(v) for v in VALUES]),
+        ('escape', lambda: [_attribute_escape(v) for v in VALUES]),
+        ('sort indexed', lambda: sorted(ATTRIBUTES, key=indexed_sort_key)),
+        ('sort', lambda: sorted(ATTRIBUTES, key=_attribute_sort_key)),
+        ('keys decoded', lambda: decoded(KEYWORDS)),
+        ('keys cached', lambda: _unicode_keyed(KEYWORDS)),
+        ]
+    return [(label, min(timeit.repeat(fn, number=number, repeat=repeat)) /
+             number)
+            for label, fn in cases]
+
+
+def form(fields):
+    rows = max(1, fields // 10)
+    Row = Dict.of(*[String.named(u'field%d' % i) for i in xrange(10)])
+    Rows = List.named(u'rows').of(Row)
+    row = dict((u'field%d' % i, u'value & <%d>' % i) for i in xrange(10))
+    return Rows([row] * rows)
+
+
+def rendering(fields, repeat=3):
+    root = form(fields)
+    leaves = [element for element in root.all_children
+              if isinstance(element, String)]
+
+    def tags():
+        gen = Generator()
+        return u''.join([gen.input(element, type=u'text')
+                         for element in leaves])
+
+    def render():
+        return Generator().render(root)
+
+    def stream():
+        for chunk in Generator().stream(root, encoding='utf-8'):
+            pass
+
+    assert tags() == render()
+    return len(leaves), [
+        (label, min(timeit.repeat(fn, number=1, repeat=repeat)))
+        for label, fn in (('tags', tags), ('render', render),
+                          ('stream', stream))]
+
+
+def main(argv):
+    fields = int(argv[1]) if len(argv) > 1 else 2000
+    for label, seconds in helpers():
+        print '%-16s %8.2f us' % (label, seconds * 1e6)
+    count, timings = rendering(fields)
+    print '%d fields' % count
+    for label, seconds in timings:
+        print '%-16s %8.4f s %8.2f us/tag' % (
+            label, seconds, seconds * 1e6 / count)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8; fill-column: 78 -*-
+"""Memory used per element by a large List of Dict tree.
+
+Usage::
+
+  python bench/memory.py [rows]
+
+Reports the bytes held by the element objects themselves: each element,
+its instance dictionary and the containers stored in it.  Shared values,
+such as interned names and the Unicode values of scalars, are not counted.
+
+"""
+import sys
+
+from flatland import Boolean, Dict, Integer, List, String
+
+
+Row = Dict.of(String.named(u'name'),
+              String.named(u'email'),
+              Integer.named(u'age'),
+              Boolean.named(u'active'))
+
+Rows = List.named(u'rows').using(
+    maximum_set_flat_members=sys.maxint).of(Row)
+
+
+def element_size(element, seen):
+    size = sys.getsizeof(element)
+    attributes = getattr(element, '__dict__', None)
+    if attributes is not None:
+        size += sys.getsizeof(attributes)
+        for value in attributes.itervalues():
+            if (isinstance(value, (list, dict, tuple)) and
+                id(value) not in seen):
+                seen.add(id(value))
+                size += sys.getsizeof(value)
+    return size
+
+
+def measure(rows):
+    pairs = []
+    for index in xrange(rows):
+        prefix = u'rows_%s_' % index
+        pairs.extend([(prefix + u'name', u'name %s' % index),
+                      (prefix + u'email', u'user%s@example.com' % index),
+                      (prefix + u'age', unicode(index % 90)),
+                      (prefix + u'active', u'1')])
+    root = Rows.from_flat(pairs)
+    results = []
+    for label in 'decoded', 'validated':
+        if label == 'validated':
+            root.validate()
+        elements = [root] + list(root.all_children)
+        # List members are wrapped in slots, which are elements too
+        elements.extend(list.__iter__(root))
+        seen = set()
+        total = sum(element_size(element, seen) for element in elements)
+        results.append((label, len(elements), total))
+    return results
+
+
+def main(argv):
+    rows = int(argv[1]) if len(argv) > 1 else 10000
+    for label, count, total in measure(rows):
+        print '%-10s %7d elements %11d bytes %7.1f bytes/element' % (
+            label, count, total, float(total) / count)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -16,6 +16,7 @@ deferred_module.shadow(
                 'Decimal',
                 'Dict',
                 'Element',
+                'ElementBuilder',
                 'Enum',
                 'Float',
                 'Form',
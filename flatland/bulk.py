@@ -0,0 +1,235 @@
+# -*- coding: utf-8; fill-column: 78 -*-
+"""Bulk validation across a pool of worker processes.
+
+A :class:`Pipeline` shards an iterable of rows across a
+:mod:`multiprocessing` pool and streams back the results of
+:meth:`~flatland.schema.base.Element.validate_many`::
+
+  with Pipeline(Record) as pipeline:
+      for index, valid, errors in pipeline.validate(rows):
+          ...
+
+Only a :class:`SchemaReference` and the raw rows are sent to the workers.
+Schema classes defined at module level are referenced by import path.
+Anonymous schema built with :meth:`~flatland.schema.base.Element.named`,
+:meth:`~flatland.schema.base.Element.using`, ``of()`` and friends are
+referenced by the recipe that built them, and are rebuilt once in each
+worker.
+
+"""
+import collections
+import itertools
+import sys
+from multiprocessing import Pool, cpu_count
+from Queue import Queue
+
+from flatland.schema.base import Element
+
+
+__all__ = ['Pipeline', 'SchemaReference']
+
+
+class SchemaReference(object):
+    """A picklable reference to a schema class.
+
+    :param schema: an :class:`~flatland.schema.base.Element` class that is
+      either importable by name or was cloned, at any depth, from one that
+      is.  Arguments given to the cloning methods, such as validators, must
+      themselves be picklable.
+
+    :raises TypeError: if *schema* can not be referenced.
+
+    """
+
+    def __init__(self, schema):
+        self.recipe = _recipe(schema)
+
+    def resolve(self):
+        """Return the referenced schema class, rebuilding it if needed."""
+        return _build(self.recipe)
+
+    def __repr__(self):
+        return 'SchemaReference(%r)' % (self.recipe,)
+
+
+def _importable(cls):
+    module = sys.modules.get(cls.__module__)
+    return getattr(module, cls.__name__, None) is cls
+
+
+def _recipe(schema):
+    if _importable(schema):
+        return ('import', schema.__module__, schema.__name__)
+    cloned_by = schema.__dict__.get('_cloned_by')
+    if cloned_by is None:
+        raise TypeError(
+            "Can not reference %s %r: it is neither importable by name nor "
+            "built with class cloning methods." % (
+                schema.__name__, schema.name))
+    base, method, args, kw = cloned_by
+    return ('clone', _recipe(base), method,
+            _encode(args), _encode(sorted(kw.items())))
+
+
+def _encode(value):
+    if isinstance(value, type) and issubclass(value, Element):
+        return _SchemaArgument(_recipe(value))
+    elif isinstance(value, (list, tuple)):
+        return type(value)(_encode(item) for item in value)
+    return value
+
+
+def _decode(value):
+    if isinstance(value, _SchemaArgument):
+        return _build(value.recipe)
+    elif isinstance(value, (list, tuple)):
+        return type(value)(_decode(item) for item in value)
+    return value
+
+
+def _build(recipe):
+    if recipe[0] == 'import':
+        __import__(recipe[1])
+        return getattr(sys.modules[recipe[1]], recipe[2])
+    _, base, method, args, kw = recipe
+    return getattr(_build(base), method)(*_decode(args), **dict(_decode(kw)))
+
+
+class _SchemaArgument(object):
+    """Marks a schema class given as an argument to a cloning method."""
+
+    def __init__(self, recipe):
+        self.recipe = recipe
+
+    def __repr__(self):
+        return '_SchemaArgument(%r)' % (self.recipe,)
+
+
+class Pipeline(object):
+    """Validates rows of one schema in a pool of worker processes.
+
+    :param schema: an :class:`~flatland.schema.base.Element` class, or a
+      :class:`SchemaReference` to one.
+
+    :param processes: the number of worker processes, defaulting to the
+      number of CPUs.
+
+    :param chunk_size: the number of rows sent to a worker at once.
+
+    :param max_pending: the most chunks in flight at any time, defaulting to
+      twice *processes*.  Rows are drawn from the input only as capacity
+      frees up, so a lazily produced input is never read far ahead of the
+      consumer of the results.
+
+    The worker pool is started on first use and stopped by :meth:`close`, or
+    on leaving a ``with`` block.
+
+    """
+
+    def __init__(self, schema, processes=None, chunk_size=100,
+                 max_pending=None):
+        if not isinstance(schema, SchemaReference):
+            schema = SchemaReference(schema)
+        self.reference = schema
+        self.processes = processes or cpu_count()
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending or 2 * self.processes
+        self._pool = None
+
+    def validate(self, rows, state=None, flat=False, ordered=True):
+        """Validate each of *rows*, generating ``(index, valid, errors)``.
+
+        Results are as from
+        :meth:`~flatland.schema.base.Element.validate_many`, and *state*
+        and *flat* are passed through to it.  *state* must be picklable.
+
+        :param ordered: if true, results are generated in input order.
+          Otherwise they are generated as workers complete them.
+
+        """
+        pool = self._start()
+        chunks = _chunked(rows, self.chunk_size)
+        tasks = ((start, chunk, state, flat) for start, chunk in chunks)
+        if ordered:
+            results = self._ordered(pool, tasks)
+        else:
+            results = self._unordered(pool, tasks)
+        for outcome in results:
+            for result in outcome:
+                yield result
+
+    def _ordered(self, pool, tasks):
+        pending = collections.deque()
+        for task in tasks:
+            if len(pending) >= self.max_pending:
+                yield _unwrap(pending.popleft().get())
+            pending.append(pool.apply_async(_validate_chunk, task))
+        while pending:
+            yield _unwrap(pending.popleft().get())
+
+    def _unordered(self, pool, tasks):
+        completed, outstanding = Queue(), 0
+        for task in tasks:
+            if outstanding >= self.max_pending:
+                yield _unwrap(completed.get())
+                outstanding -= 1
+            pool.apply_async(_validate_chunk, task, callback=completed.put)
+            outstanding += 1
+        while outstanding:
+            yield _unwrap(completed.get())
+            outstanding -= 1
+
+    def _start(self):
+        if self._pool is None:
+            self._pool = Pool(self.processes, _start_worker, (self.reference,))
+        return self._pool
+
+    def close(self):
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _chunked(rows, size):
+    rows, start = iter(rows), 0
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def _unwrap(outcome):
+    results, error = outcome
+    if error is not None:
+        raise error
+    return results
+
+
+# The schema of a worker process, resolved once when the worker starts.
+_worker_schema = None
+
+
+def _start_worker(reference):
+    global _worker_schema
+    _worker_schema = reference.resolve()
+
+
+def _validate_chunk(start, rows, state, flat):
+    # Failures are returned rather than raised so that unordered results,
+    # collected by callback, always arrive.
+    try:
+        return [(start + index, valid, errors)
+                for index, valid, errors
+                in _worker_schema.validate_many(rows, state, flat)], None
+    except Exception, exc:
+        return None, exc
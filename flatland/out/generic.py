@@ -11,24 +11,92 @@ _default_context = {}
 _auto_tags = {}
 _id_invalid_re = re.compile(r'[^A-Za-z0-9_:.\-]')
 
+# transform -> (toggle, tags or None, body) for transforms built by _toggled
+_steps = {}
+# the toggles of _steps, in transform order
+_toggles, _toggle_set = (), frozenset()
+# (tagname, toggle settings) -> tuple of bodies that can apply to the tag
+_pipelines = {}
+
 
 def transform(tagname, attributes, contents, context, bind):
     """Transform tag *attributes* in-place & return transformed *contents*"""
-    for fn in _transforms:
-        contents = fn(tagname, attributes, contents, context, bind)
+    if attributes and _toggle_set.intersection(attributes):
+        # toggled per tag: run each transform in full
+        for fn in _transforms:
+            contents = fn(tagname, attributes, contents, context, bind)
+        return contents
+    try:
+        settings = context._snapshot(_toggles)
+    except AttributeError:
+        settings = tuple([context[toggle] for toggle in _toggles])
+    try:
+        pipeline = _pipelines[tagname, settings]
+    except KeyError:
+        pipeline = _pipelines[tagname, settings] = _compile(tagname, settings)
+    except TypeError:
+        pipeline = _compile(tagname, settings)
+    if pipeline:
+        derived = _Derived(bind)
+        for body in pipeline:
+            contents = body(tagname, attributes, contents, context, bind,
+                            False, derived)
     return contents
 
 
+def _compile(tagname, settings):
+    """Return the transform bodies that can apply to an untoggled tag."""
+    settings = dict(zip(_toggles, settings))
+    pipeline = []
+    for fn in _transforms:
+        if fn not in _steps:
+            pipeline.append(_adapt(fn))
+            continue
+        toggle, tags, body = _steps[fn]
+        proceed = parse_trool(settings[toggle])
+        if proceed is Maybe:
+            proceed = _default_context[toggle]
+        if proceed and (tags is None or tagname in tags):
+            pipeline.append(body)
+    return tuple(pipeline)
+
+
+def _adapt(fn):
+    def body(tagname, attributes, contents, context, bind, forced, derived):
+        return fn(tagname, attributes, contents, context, bind)
+    return body
+
+
+class _Derived(object):
+    """Values computed once per tag and shared by its transforms."""
+
+    __slots__ = 'bind', '_flattened_name'
+
+    def __init__(self, bind):
+        self.bind = bind
+        self._flattened_name = None
+
+    def flattened_name(self):
+        if self._flattened_name is None:
+            self._flattened_name = self.bind.flattened_name()
+        return self._flattened_name
+
+
 class Context(object):
     """A stacked key/value mapping."""
 
     def __init__(self):
-        self._frames = [dict(_default_context)]
+        # the current value of every key, and a stack of frames recording
+        # the values each scope overwrote.  push() is O(1) and pop() is
+        # proportional to the keys written in the scope it closes.
+        self._values = dict(_default_context)
+        self._frames = [{}]
+        # key tuple -> tuple of values, for keys read together on every tag
+        self._snapshots = {}
+        self._snapshot_keys = frozenset()
 
     def push(self, **options):
-        # for this size dict & usage pattern, copying turns out to be cheaper
-        # than directing __getitem__ down through a stack of sparse frames.
-        self._frames.append(self._frames[-1].copy())
+        self._frames.append({})
         try:
             self.update(**options)
         except KeyError:
@@ -38,19 +106,45 @@ class Context(object):
     def pop(self):
         if len(self._frames) == 1:
             raise RuntimeError("Can not pop() the base context frame.")
-        self._frames.pop()
+        overwritten = self._frames.pop()
+        if overwritten:
+            self._values.update(overwritten)
+            if self._snapshot_keys.intersection(overwritten):
+                self._snapshots.clear()
 
     def __getitem__(self, key):
-        return self._frames[-1][key]
+        return self._values[key]
 
     def __setitem__(self, key, value):
-        if key not in self:
+        values = self._values
+        if key not in values:
             raise KeyError("%r not permitted in this %s" % (
                 key, self.__class__.__name__))
-        self._frames[-1][key] = value
+        overwritten = self._frames[-1]
+        if key not in overwritten and len(self._frames) > 1:
+            overwritten[key] = values[key]
+        values[key] = value
+        if key in self._snapshot_keys:
+            self._snapshots.clear()
+
+    def _snapshot(self, keys):
+        """Return the values of *keys*, a tuple, as a tuple.
+
+        The result is cached until one of *keys* is written or popped.
+
+        """
+        try:
+            return self._snapshots[keys]
+        except KeyError:
+            pass
+        values = self._values
+        snapshot = self._snapshots[keys] = tuple([values[key]
+                                                   for key in keys])
+        self._snapshot_keys = self._snapshot_keys.union(keys)
+        return snapshot
 
     def __contains__(self, key):
-        return key in self._frames[-1]
+        return key in self._values
 
     def update(self, *iterable, **kwargs):
         if len(iterable):
@@ -65,7 +159,7 @@ class Context(object):
             self[key.decode('ascii')] = value
 
     def __repr__(self):
-        return "%s(%r)" % (self.__class__.__name__, self._frames[-1])
+        return "%s(%r)" % (self.__class__.__name__, self._values)
 
 
 class Markup(unicode):
@@ -84,10 +178,45 @@ def transformer(name, tags):
     def decorator(fn):
         _transforms.append(fn)
         _auto_tags[name] = set(tags)
+        if hasattr(fn, '_body'):
+            _register(fn, _auto_tags[name])
+        # compiled pipelines predate the new transform
+        _pipelines.clear()
         return fn
     return decorator
 
 
+def _toggled(toggle):
+    """Build a transform from *body*, run only when *toggle* allows.
+
+    *body* is called with the tag's arguments, whether the toggle was
+    forced on by the tag, and the tag's :class:`_Derived` values.
+
+    """
+    def decorator(body):
+        def fn(tagname, attributes, contents, context, bind):
+            proceed, forced = _pop_toggle(toggle, attributes, context)
+            if not proceed:
+                return contents
+            return body(tagname, attributes, contents, context, bind,
+                        forced, _Derived(bind))
+        fn.__name__ = body.__name__
+        fn.__doc__ = body.__doc__
+        fn._toggle, fn._body = toggle, body
+        return fn
+    return decorator
+
+
+def _register(fn, tags):
+    global _toggles, _toggle_set
+    toggle = fn._toggle
+    _steps[fn] = toggle, tags, fn._body
+    if toggle not in _toggles:
+        _toggles += (toggle,)
+        _toggle_set = frozenset(_toggles)
+    _pipelines.clear()
+
+
 def defaults(data):
     def decorator(fn):
         _default_context.update(data)
@@ -97,12 +226,13 @@ def defaults(data):
 
 @transformer(u'name', (u'input', u'button', u'select', u'textarea', u'form'))
 @defaults({u'auto_name': True})
-def transform_name(tagname, attributes, contents, context, bind):
-    proceed, forced = _pop_toggle(u'auto_name', attributes, context)
-    if not proceed or bind is None:
+@_toggled(u'auto_name')
+def transform_name(tagname, attributes, contents, context, bind, forced,
+                   derived):
+    if bind is None:
         return contents
 
-    bound_name = bind.flattened_name()
+    bound_name = derived.flattened_name()
     if not bound_name:
         return contents
 
@@ -114,10 +244,11 @@ def transform_name(tagname, attributes, contents, context, bind):
 
 @transformer(u'value', (u'button', u'input', u'option', u'textarea'))
 @defaults({u'auto_value': True})
-def transform_value(tagname, attributes, contents, context, bind):
-    proceed, forced = _pop_toggle(u'auto_value', attributes, context)
+@_toggled(u'auto_value')
+def transform_value(tagname, attributes, contents, context, bind, forced,
+                    derived):
     # Abort on unbound tags.
-    if not proceed or bind is None:
+    if bind is None:
         return contents
 
     if not forced and tagname not in _auto_tags[u'value']:
@@ -178,14 +309,12 @@ def transform_value(tagname, attributes, contents, context, bind):
 
 @transformer(u'id', (u'input', u'button', u'select', u'textarea'))
 @defaults({u'auto_domid': False, u'domid_format': u'f_%s'})
-def transform_domid(tagname, attributes, contents, context, bind):
-    proceed, forced = _pop_toggle(u'auto_domid', attributes, context)
-    if not proceed:
-        return contents
-
+@_toggled(u'auto_domid')
+def transform_domid(tagname, attributes, contents, context, bind, forced,
+                    derived):
     current = attributes.get(u'id')
     if forced or current is None and tagname in _auto_tags[u'id']:
-        raw_id = _generate_raw_domid(tagname, attributes, bind)
+        raw_id = _generate_raw_domid(tagname, attributes, bind, derived)
         if raw_id:
             fmt = context[u'domid_format']
             attributes[u'id'] = fmt % raw_id
@@ -194,14 +323,15 @@ def transform_domid(tagname, attributes, contents, context, bind):
 
 @transformer(u'for', (u'label',))
 @defaults({u'auto_for': False})
-def transform_for(tagname, attributes, contents, context, bind):
-    proceed, forced = _pop_toggle(u'auto_for', attributes, context)
-    if not proceed or bind is None:
+@_toggled(u'auto_for')
+def transform_for(tagname, attributes, contents, context, bind, forced,
+                  derived):
+    if bind is None:
         return contents
 
     current = attributes.get(u'for')
     if forced or current is None and tagname in _auto_tags[u'for']:
-        raw_id = _generate_raw_domid(tagname, attributes, bind)
+        raw_id = _generate_raw_domid(tagname, attributes, bind, derived)
         if raw_id:
             fmt = context[u'domid_format']
             attributes[u'for'] = fmt % raw_id
@@ -210,11 +340,9 @@ def transform_for(tagname, attributes, contents, context, bind):
 
 @transformer(u'tabindex', (u'input', u'button', u'select', u'textarea'))
 @defaults({u'auto_tabindex': False, u'tabindex': 0})
-def transform_tabindex(tagname, attributes, contents, context, bind):
-    proceed, forced = _pop_toggle(u'auto_tabindex', attributes, context)
-    if not proceed:
-        return contents
-
+@_toggled(u'auto_tabindex')
+def transform_tabindex(tagname, attributes, contents, context, bind, forced,
+                       derived):
     tabindex = context[u'tabindex']
     if tabindex == 0:
         return contents
@@ -228,13 +356,11 @@ def transform_tabindex(tagname, attributes, contents, context, bind):
 
 
 @defaults({u'auto_filter': False, u'filters': ()})
-def transform_filters(tagname, attributes, contents, context, bind):
-    proceed, forced = _pop_toggle(u'auto_filter', attributes, context)
+@_toggled(u'auto_filter')
+def transform_filters(tagname, attributes, contents, context, bind, forced,
+                      derived):
     filters = context[u'filters']
 
-    if not proceed:
-        return contents
-
     for fn in filters:
         want = getattr(fn, 'tags', None)
         if want and tagname not in want:
@@ -245,6 +371,7 @@ def transform_filters(tagname, attributes, contents, context, bind):
     return contents
 
 _transforms.append(transform_filters)
+_register(transform_filters, None)
 
 
 def _pop_toggle(key, attributes, context):
@@ -268,9 +395,9 @@ def _pop_toggle(key, attributes, context):
     return value, forced
 
 
-def _generate_raw_domid(tagname, attributes, bind):
+def _generate_raw_domid(tagname, attributes, bind, derived):
     if bind is not None:
-        basis = bind.flattened_name()
+        basis = derived.flattened_name()
     else:
         basis = attributes.get(u'name')
     if not basis:
@@ -302,10 +429,12 @@ def _sanitize_domid_suffix(string):
 def _markup_escape(string):
     if not string:
         return u''
-    elif hasattr(string, '__html__'):
+    elif type(string) is not unicode and hasattr(string, '__html__'):
         return string.__html__()
-    else:
+    elif u'&' in string or u'<' in string or u'>' in string:
         return string. \
                replace(u'&', u'&amp;'). \
                replace(u'<', u'&lt;'). \
                replace(u'>', u'&gt;')
+    else:
+        return string
@@ -2,10 +2,32 @@ from collections import defaultdict
 
 from flatland.out.generic import Context, transform
 from flatland.out.util import parse_trool
+from flatland.schema import Boolean, Container, Scalar
 
 
 _default_options = {u'ordered_attributes': True}
 _static_attribute_order = [u'type', u'name', u'value']
+# attribute name -> its sort key, for the attributes ordered statically
+_static_attribute_keys = dict((name, (0, index)) for index, name
+                              in enumerate(_static_attribute_order))
+# keyword argument name -> attribute name
+_unicode_keys = {}
+
+# tagname -> (empty in html, always paired)
+_tag_forms = {
+    u'form': (False, True),
+    u'input': (True, False),
+    u'textarea': (False, True),
+    u'select': (False, True),
+    u'option': (False, True),
+    }
+
+#: The widgets used by :meth:`Generator.render` when none are given.
+default_widgets = {
+    Scalar: (u'input', {u'type': u'text'}),
+    Boolean: (u'input', {u'type': u'checkbox'}),
+    Container: None,
+    }
 
 
 class Generator(Context):
@@ -19,7 +41,7 @@ class Generator(Context):
         else:
             raise TypeError("Unknown markup type %r" % markup)
         self._tags = defaultdict(list)
-        self._frames[-1].update(_default_options)
+        self._values.update(_default_options)
         self.push()
         self.update(options)
 
@@ -45,15 +67,15 @@ class Generator(Context):
 
     @property
     def form(self):
-        return self._tag(u'form', False, True)
+        return self._tag(u'form', *_tag_forms[u'form'])
 
     @property
     def input(self):
-        return self._tag(u'input', True)
+        return self._tag(u'input', *_tag_forms[u'input'])
 
     @property
     def textarea(self):
-        return self._tag(u'textarea', False, True)
+        return self._tag(u'textarea', *_tag_forms[u'textarea'])
 
     @property
     def button(self):
@@ -61,11 +83,11 @@ class Generator(Context):
 
     @property
     def select(self):
-        return self._tag(u'select', False, True)
+        return self._tag(u'select', *_tag_forms[u'select'])
 
     @property
     def option(self):
-        return self._tag(u'option', False, True)
+        return self._tag(u'option', *_tag_forms[u'option'])
 
     @property
     def label(self):
@@ -85,6 +107,126 @@ class Generator(Context):
             return self._tags[tagname][-1]
         return Tag(tagname, self, empty_in_html, always_paired)
 
+    def render(self, element, widget_map=None, sink=None):
+        """Render the tags of *element* and all of its descendants.
+
+        :param element: the root :class:`~flatland.schema.base.Element` to
+          render.
+
+        :param widget_map: a mapping selecting the widget of each element,
+          defaulting to :data:`default_widgets`.  Keys are element
+          flattened names or schema classes.  An element's flattened name
+          is tried first, then each class in its schema's method resolution
+          order.  Values are a tag name, a ``(tagname, attributes)`` pair,
+          None for no tag of its own, or a callable of ``(generator,
+          element)`` returning markup for the element and its
+          descendants.
+
+        :param sink: optional, a file-like object to write markup to.
+
+        :returns: the markup, or None if written to *sink*.
+
+        Elements are rendered depth-first, in document order, through the
+        same transforms as individual tags.  A container with a tag
+        encloses the markup of its children.  Elements with no widget
+        render nothing themselves, but their children are still visited.
+
+        """
+        if sink is not None:
+            write = sink.write
+            for chunk in self._chunks(element, widget_map):
+                write(chunk)
+            return None
+        return self[u'markup_wrapper'](
+            u''.join(self._chunks(element, widget_map)))
+
+    def stream(self, element, widget_map=None, encoding=None,
+               chunk_size=8192):
+        """Generate the markup of :meth:`render` in chunks.
+
+        Tags are rendered as the chunks are consumed, so the first chunk is
+        ready before the rest of the tree has been visited.  The generator
+        is suitable as a WSGI response body when *encoding* is given.
+
+        :param encoding: optional, an encoding for byte string chunks.
+          Otherwise chunks are markup, as returned by :meth:`render`.
+
+        :param chunk_size: the size, in characters, that chunks are
+          gathered to before being generated.
+
+        """
+        if encoding is None:
+            finish = self[u'markup_wrapper']
+        else:
+            finish = lambda chunk: chunk.encode(encoding)
+        buffer, size = [], 0
+        for piece in self._chunks(element, widget_map):
+            buffer.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                yield finish(u''.join(buffer))
+                buffer, size = [], 0
+        if buffer:
+            yield finish(u''.join(buffer))
+
+    def _chunks(self, element, widget_map):
+        """Generate the markup of each tag under *element*, in order."""
+        if widget_map is None:
+            widget_map = default_widgets
+        by_name = any(isinstance(key, basestring) for key in widget_map)
+        # schema -> (Tag or callable or None, attributes)
+        by_schema = {}
+
+        # (children to visit, closing tag or None)
+        stack = [(iter((element,)), None)]
+        while stack:
+            elements, closing = stack[-1]
+            for element in elements:
+                schema = type(element)
+                name = by_name and element.flattened_name()
+                if name and name in widget_map:
+                    widget = self._widget(widget_map[name])
+                else:
+                    try:
+                        widget = by_schema[schema]
+                    except KeyError:
+                        widget = by_schema[schema] = self._widget(
+                            _schema_widget(schema, widget_map))
+                tag, attributes = widget
+                if tag is None:
+                    stack.append((iter(element.children), None))
+                    break
+                elif attributes is None:
+                    markup = tag(self, element)
+                    if markup:
+                        yield markup
+                elif isinstance(element, Container):
+                    header, contents = tag._start(
+                        element, attributes.copy(), None)
+                    yield header + u'>' + contents
+                    stack.append((iter(element.children), tag._close()))
+                    break
+                else:
+                    yield tag._render(element, attributes.copy(), None)
+            else:
+                stack.pop()
+                if closing is not None:
+                    yield closing
+
+    def _widget(self, widget):
+        """Return ``(Tag, attributes)``, ``(callable, None)`` or no tag."""
+        if widget is None:
+            return None, None
+        if isinstance(widget, basestring):
+            tagname, attributes = widget, {}
+        elif isinstance(widget, tuple):
+            tagname, attributes = widget
+        else:
+            return widget, None
+        tagname = unicode(tagname).lower()
+        tag = Tag(tagname, self, *_tag_forms.get(tagname, (False, False)))
+        return tag, dict(attributes)
+
 
 class Tag(object):
     __slots__ = ('tagname', 'contents', '_context',
@@ -112,7 +254,12 @@ class Tag(object):
     def _open(self, bind, kwargs):
         """Return a '<partial' opener tag with no terminator."""
         contents = kwargs.pop('contents', None)
-        attributes = _unicode_keyed(kwargs)
+        header, contents = self._start(bind, _unicode_keyed(kwargs), contents)
+        self.contents = self._markup(contents)
+        return header
+
+    def _start(self, bind, attributes, contents):
+        """Return a '<partial' opener and the transformed *contents*."""
         tagname = self.tagname
         new_contents = transform(
             tagname, attributes, contents, self._context, bind)
@@ -121,7 +268,6 @@ class Tag(object):
             new_contents = u''
         elif hasattr(new_contents, '__html__'):
             new_contents = new_contents.__html__()
-        self.contents = self._markup(new_contents)
 
         if self._context['ordered_attributes']:
             pairs = sorted(attributes.items(), key=_attribute_sort_key)
@@ -130,9 +276,9 @@ class Tag(object):
         guts = u' '.join(u'%s="%s"' % (k, _attribute_escape(v))
                          for k, v in pairs)
         if guts:
-            return u'<' + tagname + u' ' + guts
+            return u'<' + tagname + u' ' + guts, new_contents
         else:
-            return u'<' + tagname
+            return u'<' + tagname, new_contents
 
     def _close(self):
         return u'</' + self.tagname + u'>'
@@ -142,13 +288,21 @@ class Tag(object):
 
     def __call__(self, bind=None, **attributes):
         header = self._open(bind, attributes)
-        if not self.contents:
+        return self._markup(self._finish(header, self.contents))
+
+    def _render(self, bind, attributes, contents):
+        """Return the complete tag for unicode-keyed *attributes*."""
+        header, contents = self._start(bind, attributes, contents)
+        return self._finish(header, contents)
+
+    def _finish(self, header, contents):
+        if not contents:
             if not self._always_paired:
                 if self._context.xml:
-                    return self._markup(header + u' />')
+                    return header + u' />'
                 elif self._html_dangle:
-                    return self._markup(header + u'>')
-        return self._markup(header + u'>' + self.contents + self._close())
+                    return header + u'>'
+        return header + u'>' + contents + self._close()
 
     def __html__(self):
         return self()
@@ -157,26 +311,36 @@ class Tag(object):
 def _attribute_escape(string):
     if not string:
         return u''
-    elif hasattr(string, '__html__'):
+    elif type(string) is not unicode and hasattr(string, '__html__'):
         return string.__html__()
-    else:
+    elif (u'&' in string or u'<' in string or u'>' in string or
+          u'"' in string):
         return string. \
                replace(u'&', u'&amp;'). \
                replace(u'<', u'&lt;'). \
                replace(u'>', u'&gt;'). \
                replace(u'"', u'&quot;')
+    else:
+        return string
 
 
 def _unicode_keyed(bytestring_keyed):
     rekeyed = {}
-    for key, value in bytestring_keyed.items():
-        as_unicode = key.rstrip('_').decode('ascii')
+    for key, value in bytestring_keyed.iteritems():
+        try:
+            as_unicode = _unicode_keys[key]
+        except KeyError:
+            as_unicode = _unicode_keys[key] = key.rstrip('_').decode('ascii')
         rekeyed[as_unicode] = value
     return rekeyed
 
 
 def _attribute_sort_key(item):
-    try:
-        return (0, _static_attribute_order.index(item[0]))
-    except ValueError:
-        return (1, item[0])
+    return _static_attribute_keys.get(item[0]) or (1, item[0])
+
+
+def _schema_widget(schema, widget_map):
+    for cls in schema.__mro__:
+        if cls in widget_map:
+            return widget_map[cls]
+    return None
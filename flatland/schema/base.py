@@ -2,15 +2,29 @@
 import collections
 import itertools
 import operator
-from flatland.schema.paths import pathexpr
-from flatland.signals import validator_validated
+from flatland.schema.paths import (
+    NAME,
+    TOP,
+    ExpressionCache,
+    PathExpression,
+    pathexpr,
+    )
+from flatland.schema.plan import (
+    plan_epoch,
+    schema_plan,
+    schema_reconfigured,
+    )
+from flatland.signals import validation_completed, validator_validated
 from flatland.util import (
     Unspecified,
     assignable_class_property,
     class_cloner,
+    lazy_property,
     named_int_factory,
     symbol,
+    threading,
     )
+from flatland.util.signals import local_state as _signal_state
 
 
 __all__ = 'Element'
@@ -19,6 +33,28 @@ NoneType = type(None)
 Root = symbol('Root')
 NotEmpty = symbol('NotEmpty')
 
+
+# Element._validation flags: the element has changed since it was last
+# validated, one of its descendants has, or its subtree was found invalid.
+_DIRTY, _DIRTY_BELOW, _INVALID_BELOW = 1, 2, 4
+
+# A number identifying each thread's current or most recent validation run.
+_validation_runs = itertools.count(1)
+_validation_run = threading.local()
+
+
+def current_validation_run():
+    """Return a number identifying the running :meth:`Element.validate`.
+
+    Each call to :meth:`~Element.validate` starts a new run.  Validators may
+    use the number to share work, such as indexes of sibling values, between
+    the elements they check during the same run.  Returns None outside of
+    :meth:`~Element.validate`, such as when a validator is called directly.
+
+    """
+    return getattr(_validation_run, 'number', None)
+
+
 Skip = named_int_factory('Skip', True, doc="""\
 Abort validation of the element & mark as valid.
 """)
@@ -52,6 +88,59 @@ Assigned to newly created elements that have never been evaluated by
 xml = None
 
 
+# Element attributes that may be assigned both on classes and on elements,
+# and whose assignment to an element changes what its subtree memoizes.
+# Stored as '_' + attribute; see _MetaElement.
+_structural_attributes = ('name', 'ugettext', 'ungettext')
+
+
+def _class_property(attribute):
+    private = '_' + attribute
+
+    def set(cls, value):
+        setattr(cls, private, value)
+    return property(operator.attrgetter(private), set)
+
+
+class _MetaElement(type):
+    """Keeps structural attributes assignable on classes and instances.
+
+    :class:`Element` reads and writes ``name``, ``ugettext`` and
+    ``ungettext`` through properties, so that assigning them on an element
+    can discard what the element and its children memoized.  A class
+    attribute of the same name would hide those properties, so class
+    declarations and assignments of these attributes are stored under a
+    leading underscore instead.
+
+    Assigning or deleting other public class attributes, such as
+    ``field_schema``, discards the schema plans that may have been built
+    from their previous values.
+
+    """
+
+    def __new__(self, class_name, bases, members):
+        for attribute in _structural_attributes:
+            value = members.get(attribute)
+            if attribute in members and not isinstance(value, property):
+                members['_' + attribute] = members.pop(attribute)
+        members['_plan_epoch'] = plan_epoch()
+        return type.__new__(self, class_name, bases, members)
+
+    def __setattr__(cls, attribute, value):
+        type.__setattr__(cls, attribute, value)
+        if not attribute.startswith('_'):
+            schema_reconfigured(cls, cls.__dict__['_plan_epoch'])
+
+    def __delattr__(cls, attribute):
+        type.__delattr__(cls, attribute)
+        if not attribute.startswith('_'):
+            schema_reconfigured(cls, cls.__dict__['_plan_epoch'])
+
+    name = _class_property('name')
+    ugettext = _class_property('ugettext')
+    ungettext = _class_property('ungettext')
+
+
 class _BaseElement(object):
     # Required by the genshi support's __bases__ manipulation, unfortunately.
     pass
@@ -63,8 +152,19 @@ class Element(_BaseElement):
     A data node that stores a Python and a text value plus added state.
     """
 
-    name = None
-    """The Unicode name of the element."""
+    __metaclass__ = _MetaElement
+
+    _name = None
+
+    def _set_name(self, name):
+        self.__dict__['_name'] = name
+        _forget_structure(self, self.parent)
+        self._mark_dirty()
+        _forget_index(self)
+
+    name = property(operator.attrgetter('_name'), _set_name,
+                    doc="""The Unicode name of the element.""")
+    del _set_name
 
     optional = False
     """If True, :meth:`validate` with return True if no value has been set.
@@ -87,17 +187,31 @@ class Element(_BaseElement):
     *default_factory* will be used preferentially over :attr:`default`.
     """
 
-    ugettext = None
-    """If set, provides translation support to validation messages.
+    _ugettext = _ungettext = None
 
-    See `Message Internationalization`_.
-    """
+    def _set_ugettext(self, ugettext):
+        self.__dict__['_ugettext'] = ugettext
+        _forget_structure(self, self.parent)
 
-    ungettext = None
-    """If set, provides translation support to validation messages.
+    ugettext = property(
+        operator.attrgetter('_ugettext'), _set_ugettext,
+        doc="""If set, provides translation support to validation messages.
 
-    See `Message Internationalization`_.
-    """
+        See `Message Internationalization`_.
+        """)
+    del _set_ugettext
+
+    def _set_ungettext(self, ungettext):
+        self.__dict__['_ungettext'] = ungettext
+        _forget_structure(self, self.parent)
+
+    ungettext = property(
+        operator.attrgetter('_ungettext'), _set_ungettext,
+        doc="""If set, provides translation support to validation messages.
+
+        See `Message Internationalization`_.
+        """)
+    del _set_ungettext
 
     value = None
     """The element's native Python value.
@@ -113,17 +227,108 @@ class Element(_BaseElement):
     restricted to validation routines.
     """
 
+    indexed = False
+    """If True on a root element, index its tree for path lookups.
+
+    :meth:`el`, and :meth:`find` with paths made only of element names,
+    remember the elements they find anywhere in the tree.  Repeated lookups
+    are single dictionary hits until the shape of the tree changes: adding,
+    removing, renaming or reordering elements empties the index.
+    """
+
     flattenable = False
     children_flattenable = True
     validates_down = None
     validates_up = None
 
-    def __init__(self, value=Unspecified, **kw):
-        self.parent = kw.pop('parent', None)
+    # Classes whose __init__ does no more than the stock constructors declare
+    # this in their own namespace, allowing instances to be cloned from a
+    # prototype.  See from_defaults().
+    _clone_safe = True
+
+    _parent = None
+
+    def _set_parent(self, parent):
+        previous = self._parent
+        self.__dict__['_parent'] = parent
+        if previous is parent:
+            return
+        # paths and names change below this element, and the membership of
+        # both parents changes
+        if '_memo' in self.__dict__:
+            _forget_structure(self, previous)
+        if previous is not None:
+            previous._reshaped()
+        if parent is not None:
+            # no longer a root
+            self.__dict__.pop('_element_index', None)
+            parent._reshaped()
+
+    parent = property(operator.attrgetter('_parent'), _set_parent,
+                      doc="""The element's parent, or None.""")
+    del _set_parent
+
+    valid = Unevaluated
+    """The result of the most recent :meth:`validate`."""
+
+    @lazy_property
+    def errors(self):
+        # created on first access: most elements never have any
+        return []
+
+    @lazy_property
+    def warnings(self):
+        return []
+
+    # Dirty tracking for incremental validation, a bitmask of the _DIRTY*
+    # flags.  Elements that have never been validated are dirty;
+    # validate(incremental=True) clears the flags on each element it
+    # visits.  See _mark_dirty().
+    _validation = _DIRTY | _DIRTY_BELOW
+
+    def _mark_dirty(self):
+        """Flag this element for re-validation.  Internal.
+
+        Called by :meth:`set` and the container methods that add, remove or
+        reorder members.  Ancestors are flagged as having dirty descendants
+        so that :meth:`validate` with *incremental* finds the element.  A
+        flagged element's ancestors are always flagged as well, letting the
+        walk stop early.
+
+        """
+        flags = self._validation
+        if flags & _DIRTY:
+            return
+        self.__dict__['_validation'] = flags | _DIRTY
+        element = self.parent
+        while element is not None:
+            flags = element._validation
+            if flags & _DIRTY_BELOW:
+                return
+            element.__dict__['_validation'] = flags | _DIRTY_BELOW
+            element = element.parent
+
+    def _reshaped(self):
+        """Note that children were added, removed or reordered.  Internal.
+
+        Flags the element for re-validation, empties the index of its tree
+        and discards the memos of its children, which re-register when next
+        memoized: members that left are no longer kept alive by this
+        element's memo.
 
-        self.valid = Unevaluated
-        self.errors = []
-        self.warnings = []
+        """
+        self._mark_dirty()
+        _forget_index(self)
+        memo = self.__dict__.get('_memo')
+        if memo is not None and memo['dependents']:
+            _forget_dependents(memo)
+
+    def __init__(self, value=Unspecified, **kw):
+        parent = kw.pop('parent', None)
+        if parent is not None:
+            # a new element has no memo or index to forget; containers
+            # adding it as a member reshape themselves
+            self.__dict__['_parent'] = parent
 
         # FIXME This (and 'using') should also do descent_validators
         # via lookup - or don't copy at all
@@ -319,10 +524,91 @@ class Element(_BaseElement):
           element.set_default()
 
         """
+        plan = schema_plan(cls)
+        prototype = plan.defaults_prototype
+        if prototype and not kw:
+            return prototype._clone(None)
         element = cls(**kw)
         element.set_default()
+        if prototype is None and not kw:
+            # the prototype is built without a parent and only its clones,
+            # also parentless, are handed out
+            if _clonable(element):
+                plan.defaults_prototype = element
+                return element._clone(None)
+            plan.defaults_prototype = False
         return element
 
+    @classmethod
+    def validate_many(cls, rows, state=None, flat=False):
+        """Validate many values against this schema, one at a time.
+
+        A generator yielding ``(index, valid, errors)`` for each of *rows*, a
+        possibly lengthy iterable of values such as the records of an import.
+        *valid* is the result of :meth:`validate` and *errors* is a mapping
+        of :meth:`flattened_name` to the :attr:`errors` of each element that
+        has any.  Each result is as if computed by::
+
+          element = cls(row)
+          valid = element.validate(state)
+
+        or, if *flat* is true, with ``cls.from_flat(row)``.
+
+        Rather than constructing a tree for every row, a single element is
+        :meth:`set` to each row in turn and returned to a pristine state after
+        it has been validated.  Flat rows are decoded into fresh elements.
+        A row with errors leaves its element to the errors, which may be
+        :class:`~flatland.validation.base.ValidationMessage` instances that
+        are yet to be expanded, and later rows use a fresh one.
+
+        """
+        element = cls()
+        for index, row in enumerate(rows):
+            if flat:
+                element = cls()
+                element.set_flat(row)
+            else:
+                element.set(row)
+            valid = element.validate(state)
+            errors = {}
+            for each in itertools.chain((element,), element.all_children):
+                overrides = each.__dict__
+                if overrides.get('errors'):
+                    errors[each.flattened_name()] = overrides.pop('errors')
+                overrides.pop('warnings', None)
+                overrides.pop('valid', None)
+            if errors and not flat:
+                element = cls()
+            yield index, valid, errors
+
+    def clone(self):
+        """Return a copy of the element and its children.
+
+        Constructors are not re-run: values, validity, errors and warnings
+        are copied as-is and the copy's children are re-parented to the copy.
+        The copy itself has no :attr:`parent`.
+
+        """
+        return self._clone(None)
+
+    def _clone(self, parent):
+        """Copy this element and its children under *parent*.  Internal."""
+        cls = type(self)
+        clone = cls.__new__(cls)
+        state = self.__dict__.copy()
+        for key, value in state.iteritems():
+            if type(value) is list:
+                state[key] = list(value)
+        # memos and the index describe the original's tree
+        if '_memo' in state:
+            del state['_memo']
+        if '_element_index' in state:
+            del state['_element_index']
+        if parent is not None or '_parent' in state:
+            state['_parent'] = parent
+        clone.__dict__ = state
+        return clone
+
     def __eq__(self, other):
         try:
             return self.value == other.value and self.u == other.u
@@ -357,27 +643,51 @@ class Element(_BaseElement):
     all_valid = property(_get_all_valid, _set_all_valid)
     del _get_all_valid, _set_all_valid
 
+    def _structural_memo(self):
+        """Return this element's memo of structural lookups.  Internal.
+
+        The memo is discarded, along with those of the element's
+        descendants, when the element is re-parented, renamed or assigned an
+        i18n helper.  See :func:`_forget_structure`.
+
+        """
+        memo = self.__dict__.get('_memo')
+        if memo is None:
+            memo = self.__dict__['_memo'] = {'dependents': {}}
+            parent = self.parent
+            if parent is not None:
+                parent._structural_memo()['dependents'][id(self)] = self
+        return memo
+
+    def _lineage(self):
+        """A tuple of all parent elements, root first.  Internal."""
+        memo = self._structural_memo()
+        try:
+            return memo['lineage']
+        except KeyError:
+            parent = self.parent
+            if parent is None:
+                lineage = ()
+            else:
+                lineage = parent._lineage() + (parent,)
+            memo['lineage'] = lineage
+            return lineage
+
     @property
     def root(self):
         """The top-most parent of the element."""
-        try:
-            return list(self.parents)[-1]
-        except IndexError:
-            return self
+        lineage = self._lineage()
+        return lineage[0] if lineage else self
 
     @property
     def parents(self):
         """An iterator of all parent elements."""
-        element = self.parent
-        while element is not None:
-            yield element
-            element = element.parent
-        raise StopIteration()
+        return reversed(self._lineage())
 
     @property
     def path(self):
         """An iterator of all elements from root to the Element, inclusive."""
-        return itertools.chain(reversed(list(self.parents)), (self,))
+        return itertools.chain(self._lineage(), (self,))
 
     @property
     def children(self):
@@ -434,13 +744,24 @@ class Element(_BaseElement):
           u'.0'
 
         """
-        if self.parent is None:
-            return sep
-
-        children_of_root = reversed(list(self.parents)[:-1])
-
+        memo = self._structural_memo()
+        try:
+            return memo['fq_name', sep]
+        except KeyError:
+            pass
+        fq_name = memo['fq_name', sep] = sep + sep.join(self._el_names())
+        return fq_name
+
+    def _el_names(self):
+        """The :meth:`el` path from the root to this element.  Internal."""
+        memo = self._structural_memo()
+        try:
+            return memo['el_names']
+        except KeyError:
+            pass
+        lineage = self._lineage()
         parts, mask = [], None
-        for element in list(children_of_root) + [self]:
+        for element in lineage[1:] + (self,) if lineage else ():
             # allow Slot elements to mask the names of their child
             # e.g.
             #     <List name='l'> <Slot name='0'> <String name='s'>
@@ -456,7 +777,8 @@ class Element(_BaseElement):
                 mask = None
                 continue
             parts.append(element.name)
-        return sep + sep.join(parts)
+        names = memo['el_names'] = tuple(parts)
+        return names
 
     def find(self, path, single=False, strict=True):
         """Find child elements by string path.
@@ -504,7 +826,10 @@ class Element(_BaseElement):
 
         """
         expr = pathexpr(path)
-        results = expr(self, strict)
+        found = None
+        if expr.names is not None:
+            found = _indexed_lookup(self, expr)
+        results = [found] if found is not None else expr(self, strict)
         if not single:
             return results
         elif not results:
@@ -515,6 +840,33 @@ class Element(_BaseElement):
         else:
             return results[0]
 
+    def find_iter(self, path, strict=True):
+        """Generate the child elements matching string path, lazily.
+
+        :param path: a path as for :meth:`find`.
+
+        :param strict: as for :meth:`find`, but the :exc:`LookupError` is
+          raised only once the search reaches the missing element.
+          Wildcard searches usually want *strict* false.
+
+        Matches are generated in the order :meth:`find` lists them, and
+        the tree is searched only as far as needed to produce the matches
+        consumed.  Taking the first match, or counting them, does not build
+        a list of all of them:
+
+        .. doctest:: find
+
+          >>> form.find_iter('/contact/**/city', strict=False).next()
+          <String u'city'; value=u'Kingsport'>
+
+        """
+        expr = pathexpr(path)
+        if expr.names is not None:
+            found = _indexed_lookup(self, expr)
+            if found is not None:
+                return iter((found,))
+        return expr.iterate(self, strict)
+
     def el(self, path, sep=u'.'):
         """Find a child element by string path.
 
@@ -556,16 +908,15 @@ class Element(_BaseElement):
           <String u'city'; value=None>
 
         """
+        names = path if isinstance(path, basestring) else tuple(path)
+        expr = _element_paths.get((names, sep))
         try:
-            names = list(self._parse_element_path(path, sep)) or ()
-            if names[0] is Root:
-                element = self.root
-                names.pop(0)
-            else:
-                element = self
-            while names:
-                element = element._index(names.pop(0))
-            return element
+            if not expr.ops:
+                raise LookupError(path)
+            found = _indexed_lookup(self, expr)
+            if found is None:
+                found = expr(self, True)[0]
+            return found
         except LookupError:
             raise KeyError('No element at %r' % (path,))
 
@@ -624,9 +975,26 @@ class Element(_BaseElement):
           u'addresses_0_address'
 
         """
-        return sep.join(parent.name
-                        for parent in self.path
-                        if parent.name is not None)
+        prefix = self._flattened_prefix(sep)
+        return u'' if prefix is None else prefix
+
+    def _flattened_prefix(self, sep):
+        """The flattened name, or None if nothing in the path is named.
+
+        Internal.
+
+        """
+        memo = self._structural_memo()
+        try:
+            return memo['flattened_name', sep]
+        except KeyError:
+            pass
+        parent = self.parent
+        prefix = None if parent is None else parent._flattened_prefix(sep)
+        if self.name is not None:
+            prefix = _join_name(prefix, self, sep)
+        memo['flattened_name', sep] = prefix
+        return prefix
 
     def flatten(self, sep=u'_', value=operator.attrgetter('u')):
         """Export an element hierarchy as a flat sequence of key, value pairs.
@@ -668,15 +1036,18 @@ class Element(_BaseElement):
           [(u'contact_name', u'')]
 
         """
-        if self.flattenable:
-            pairs = [(self.flattened_name(sep), value(self))]
-        else:
-            pairs = []
-        if self.children_flattenable:
-            pairs.extend((e.flattened_name(sep), value(e))
-                         for e in self.all_children
-                         if e.flattenable)
-        return pairs
+        return list(self.iterflatten(sep, value))
+
+    def iterflatten(self, sep=u'_', value=operator.attrgetter('u')):
+        """Generate the flattened key, value pairs of an element hierarchy.
+
+        Yields the same pairs as :meth:`flatten`, depth-first in schema
+        order, without building the complete list.
+
+        """
+        prefix = self._flattened_prefix(sep)
+        for name, element in walk_flattenable(self, prefix, _join_name, sep):
+            yield (u'' if name is None else name), value(element)
 
     def set(self, value):
         """Assign the native and Unicode value.
@@ -726,6 +1097,10 @@ class Element(_BaseElement):
         Given a sequence of name/value tuples or a dict, build out a
         structured tree of value elements.
 
+        Each pair is routed directly to the element its key names in a
+        single pass over *pairs*, using a decoder compiled once per schema
+        class.  See :mod:`flatland.schema.flat`.
+
         """
         if hasattr(pairs, 'items'):
             pairs = pairs.items()
@@ -744,14 +1119,30 @@ class Element(_BaseElement):
         """True if the element has no value."""
         return True if (self.value is None and self.u == u'') else False
 
-    def validate(self, state=None, recurse=True):
+    def validate(self, state=None, recurse=True, incremental=False):
         """Assess the validity of this element and its children.
 
         :param state: optional, will be passed unchanged to all validator
             callables.
 
-        :param recurse: if False, do not validate children.  :returns: True or
-          False
+        :param recurse: if False, do not validate children.
+
+        :param incremental: if True, only re-run validation where the tree
+          has changed since the last incremental validation: on elements
+          changed by :meth:`set`, :meth:`set_flat` or :meth:`set_default`,
+          on containers whose members were added, removed or reordered, and
+          on all of their ancestors.  Other elements keep their previous
+          validity.  A validator is re-run only when its own element or one
+          of that element's descendants changed: one that reads a sibling,
+          or any other element through :meth:`el` or :meth:`find`, is not
+          re-run when only that other element changed, and results that
+          depend on *state* are not recomputed.  Direct assignments to
+          :attr:`value` or :attr:`u` are not tracked.  Validation without
+          *incremental* leaves the tracking alone: each incremental
+          validation re-checks what changed since the previous one, and the
+          first checks the whole tree.
+
+        :returns: True or False
 
         Iterates through this element and all of its children, invoking each
         element's :meth:`schema.validate_element`.  Each element will be
@@ -760,7 +1151,28 @@ class Element(_BaseElement):
 
         Returns True if all validations pass, False if one or more fail.
 
+        Emits :attr:`flatland.signals.validation_completed` when done.
+
         """
+        outer_run = getattr(_validation_run, 'number', None)
+        _validation_run.number = _validation_runs.next()
+        try:
+            if (not validation_completed.receivers or
+                validation_completed in _signal_state.muted):
+                return self._run_validation(state, recurse, incremental)
+            events, outer = [], getattr(_validation_run, 'events', None)
+            _validation_run.events = events
+            try:
+                valid = self._run_validation(state, recurse, incremental)
+            finally:
+                _validation_run.events = outer
+        finally:
+            _validation_run.number = outer_run
+        validation_completed.send(
+            self, state=state, result=valid, events=events)
+        return valid
+
+    def _run_validation(self, state, recurse, incremental):
         if not recurse:
             down = self._validate(state, True)
             if down is Unevaluated:
@@ -775,6 +1187,77 @@ class Element(_BaseElement):
                 self.valid = bool(up)
             return self.valid
 
+        if not incremental:
+            return self._validate_all(state)
+        if not self._validation & (_DIRTY | _DIRTY_BELOW):
+            return not self._validation & _INVALID_BELOW
+
+        # (element, validated ok, children or None if skipped)
+        visits, seen, queue = [], set(), collections.deque([self])
+
+        # descend breadth first, skipping any branches that return All*
+        while queue:
+            element = queue.popleft()
+            if id(element) in seen:
+                continue
+            seen.add(id(element))
+            validated = element._validate(state, True)
+
+            if validated is Unevaluated:
+                element.valid = validated
+                ok = True
+            else:
+                element.valid = bool(validated)
+                ok = True & validated
+            if validated is SkipAll or validated is SkipAllFalse:
+                visits.append((element, ok, None))
+                continue
+            children = tuple(element.children)
+            visits.append((element, ok, children))
+            queue.extend(child for child in children
+                         if child._validation & (_DIRTY | _DIRTY_BELOW))
+
+        # back up, visiting only the elements that weren't skipped above
+        for element, ok, children in reversed(visits):
+            validated = element._validate(state, False)
+
+            # an Unevaluated ascent validator does not override the results
+            # of descent validation
+            if validated is Unevaluated:
+                pass
+            elif element.valid:
+                element.valid = bool(validated)
+                ok = True & validated
+
+            # children are complete: either visited above or unchanged since
+            # their last validation.  Children skipped by an All* descent
+            # stay pending, along with the path to them, and are revisited
+            # by the next incremental run.
+            if children is None:
+                pending = any(True for _ in element.children)
+            else:
+                pending = False
+                for child in children:
+                    flags = child._validation
+                    if flags & _DIRTY_BELOW:
+                        pending = True
+                    if flags & _INVALID_BELOW:
+                        ok = False
+            flags = 0 if ok else _INVALID_BELOW
+            if pending:
+                flags |= _DIRTY_BELOW
+            element.__dict__['_validation'] = flags
+
+        if self._validation & _DIRTY_BELOW:
+            element = self.parent
+            while element is not None:
+                element.__dict__['_validation'] = (
+                    element._validation | _DIRTY_BELOW)
+                element = element.parent
+        return not self._validation & _INVALID_BELOW
+
+    def _validate_all(self, state):
+        """Validate the whole tree, without dirty tracking.  Internal."""
         valid = True
         elements, seen, queue = [], set(), collections.deque([self])
 
@@ -862,10 +1345,184 @@ class Element(_BaseElement):
         raise TypeError('%s object is unhashable', self.__class__.__name__)
 
 
+def _compile_element_path(key):
+    path, sep = key
+    ops = [(NAME, name) for name in Element._parse_element_path(path, sep)]
+    if ops and ops[0][1] is Root:
+        ops[0] = (TOP, None)
+    return PathExpression(path, ops)
+
+
+# Compiled Element.el() paths, keyed by (path, sep)
+_element_paths = ExpressionCache(compiler=_compile_element_path)
+
+# Set once any tree has been indexed.  Until then there is no index for
+# _forget_index() to search for.
+_indexing = False
+
+
+def _indexed_lookup(element, expr):
+    """Find the element named by *expr* through the root's index.
+
+    *expr* must consist only of element names.  Returns None if nothing
+    matches, or if the tree is not :attr:`~Element.indexed`.
+
+    """
+    memo = element._structural_memo()
+    try:
+        index, prefix = memo['index']
+    except KeyError:
+        root = element.root
+        if not root.indexed:
+            index = prefix = None
+        else:
+            index = root.__dict__.get('_element_index')
+            if index is None:
+                global _indexing
+                _indexing = True
+                index = root.__dict__['_element_index'] = {}
+            prefix = element._el_names()
+            if isinstance(element, Slot) or None in prefix:
+                # not addressable by name; only absolute paths are indexed
+                prefix = None
+        memo['index'] = index, prefix
+    if index is None:
+        return None
+    if expr.absolute:
+        key = expr.names
+    elif prefix is None:
+        return None
+    else:
+        key = prefix + expr.names
+    try:
+        return index[key]
+    except KeyError:
+        found = expr(element, False)
+        found = index[key] = found[0] if found else None
+        return found
+
+
+def _forget_structure(element, parent):
+    """Discard the structural memos of *element* and its descendants.
+
+    *parent* is the element's parent when its memo was made.  Each memo
+    records the memos made below it, those of children, List slots and
+    anything else that named the element as its parent, so only memoized
+    branches are searched.
+
+    """
+    memo = element.__dict__.pop('_memo', None)
+    if memo is None:
+        return
+    if parent is not None:
+        above = parent.__dict__.get('_memo')
+        if above is not None:
+            above['dependents'].pop(id(element), None)
+    _forget_dependents(memo)
+
+
+def _forget_dependents(memo):
+    """Discard the memos made below *memo* and empty its dependents."""
+    stack = [memo]
+    while stack:
+        dependents = stack.pop()['dependents']
+        for dependent in dependents.itervalues():
+            memo = dependent.__dict__.pop('_memo', None)
+            if memo is not None:
+                stack.append(memo)
+        dependents.clear()
+
+
+def _forget_index(element):
+    """Empty the index of *element*'s tree, if the tree has one.
+
+    The index is emptied in place: elements of the tree hold on to it in
+    their memos.
+
+    """
+    if not _indexing:
+        return
+    parent = element.parent
+    while parent is not None:
+        element, parent = parent, parent.parent
+    index = element.__dict__.get('_element_index')
+    if index:
+        index.clear()
+
+
 class Slot(object):
     """Marks a semi-visible Element-holding Element, like the 0 in list[0]."""
 
 
+def _clonable(element):
+    """True if every element in the tree may be built by cloning."""
+    for el in itertools.chain((element,), element.all_children):
+        for cls in type(el).__mro__:
+            if '__init__' in cls.__dict__:
+                if not cls.__dict__.get('_clone_safe', False):
+                    return False
+                break
+        # factories may produce a fresh default on every call
+        if el.default_factory is not None:
+            return False
+    return True
+
+
+def _join_name(prefix, element, sep):
+    name = element.name
+    return name if prefix is None else prefix + sep + name
+
+
+def walk_flattenable(element, prefix, join, sep):
+    """Generate ``(name, element)`` for each flattenable element, depth-first.
+
+    :param prefix: the name of *element*, or None if it has no flattened
+      name.  Descendant names are built from it on the way down.
+
+    :param join: a callable of ``(prefix, element, sep)`` returning *prefix*
+      extended with the name of a named *element*.  *prefix* is None until
+      some element on the path has been named.
+
+    Names may be anything *join* produces: :meth:`Element.iterflatten`
+    builds Unicode strings, :func:`~flatland.schema.flat.urlencoded` builds
+    pre-quoted byte strings.
+
+    """
+    if element.flattenable:
+        yield prefix, element
+    if not element.children_flattenable:
+        return
+    stack = [(element, prefix, iter(element.children))]
+    while stack:
+        parent, prefix, children = stack[-1]
+        for child in children:
+            name = _extend_prefix(prefix, parent, child, join, sep)
+            if child.flattenable:
+                yield name, child
+            if child.children_flattenable:
+                stack.append((child, name, iter(child.children)))
+                break
+        else:
+            stack.pop()
+
+
+def _extend_prefix(prefix, parent, child, join, sep):
+    """Extend *parent*'s *prefix* with the names down to *child*."""
+    if child.parent is parent:
+        if child.name is None:
+            return prefix
+        return join(prefix, child, sep)
+    # descend through intermediaries such as List slots
+    lineage, element = [], child
+    while element is not parent and element is not None:
+        if element.name is not None:
+            lineage.append(element)
+        element = element.parent
+    for element in reversed(lineage):
+        prefix = join(prefix, element, sep)
+    return prefix
+
+
 def validate_element(element, state, validators):
     """Apply a set of validators to an element.
 
@@ -888,17 +1545,19 @@ def validate_element(element, state, validators):
     """
     if element.is_empty and element.optional:
         return True
+    if validator_validated.receivers or validation_completed.receivers:
+        observe = _observer()
+    else:
+        observe = None
     if not validators:
         valid = not element.is_empty
-        if validator_validated.receivers:
-            validator_validated.send(
-                NotEmpty, element=element, state=state, result=valid)
+        if observe:
+            observe(NotEmpty, element, state, valid)
         return valid
     for fn in validators:
         valid = fn(element, state)
-        if validator_validated.receivers:
-            validator_validated.send(
-                fn, element=element, state=state, result=valid)
+        if observe:
+            observe(fn, element, state, valid)
         if valid is None:
             return False
         elif valid is Skip:
@@ -906,3 +1565,23 @@ def validate_element(element, state, validators):
         elif not valid or valid is SkipAll:
             return valid
     return True
+
+
+def _observer():
+    """Return a function recording validator results, or None."""
+    events = getattr(_validation_run, 'events', None)
+    if (not validator_validated.receivers or
+        validator_validated in _signal_state.muted):
+        if events is None:
+            return None
+        return lambda fn, element, state, result: events.append(
+            (fn, element, result))
+    send = validator_validated.send
+    if events is None:
+        return lambda fn, element, state, result: send(
+            fn, element=element, state=state, result=result)
+
+    def observe(fn, element, state, result):
+        events.append((fn, element, result))
+        send(fn, element=element, state=state, result=result)
+    return observe
@@ -3,11 +3,14 @@ import operator
 
 from flatland.exc import AdaptationError
 from flatland.util import Unspecified, threading
+from .base import _MetaElement
 from .containers import Array, Mapping
+from .flat import MappingNode, ScalarNode
+from .plan import discard_plan
 from .scalars import Date, Integer, Scalar, String
 
 
-class _MetaCompound(type):
+class _MetaCompound(_MetaElement):
     """Adds a class-level initialization hook """
 
     _lock = threading.RLock()
@@ -17,7 +20,7 @@ class _MetaCompound(type):
         if '__compound_init__' in members:
             members['__compound_init__'] = \
               _wrap_compound_init(members['__compound_init__'])
-        return type.__new__(self, name, bases, members)
+        return _MetaElement.__new__(self, name, bases, members)
 
     def __call__(cls, value=Unspecified, **kw):
         """Run __compound_init__ on first instance construction."""
@@ -63,6 +66,8 @@ def _wrap_compound_init(fn):
     def __compound_init__(cls):
         res = fn(cls)
         cls._compound_prepared = True
+        # the hook may have reconfigured an already-planned class
+        discard_plan(cls)
         return res
     update_wrapper(__compound_init__, fn)
     return classmethod(__compound_init__)
@@ -172,6 +177,8 @@ class Compound(Mapping, Scalar):
             # adaptation exceptions to bubble up.
             return False
 
+    _flat_node = MappingNode
+
     def _set_flat(self, pairs, sep):
         Mapping._set_flat(self, pairs, sep)
 
@@ -311,6 +318,8 @@ class JoinedString(Array, String):
             self.append(child)
         return all(success)
 
+    _flat_node = ScalarNode
+
     def _set_flat(self, pairs, sep):
         return Scalar._set_flat(self, pairs, sep)
 
@@ -1,17 +1,16 @@
 # -*- coding: utf-8; fill-column: 78 -*-
-from collections import defaultdict
-import re
-
 from flatland.util import (
     Unspecified,
     assignable_class_property,
     autodocument_from_superclasses,
     class_cloner,
     keyslice_pairs,
-    re_uescape,
     to_pairs,
     )
 from .base import Element, Unevaluated, Slot, validate_element
+from .flat import ArrayNode, ListNode, MappingNode, decode_flat
+from .paths import MappingSteps, SequenceSteps
+from .plan import schema_plan
 from .scalars import Scalar
 
 
@@ -50,6 +49,16 @@ class Container(Element):
     descent_validators = ()
     """TODO: doc descent_validators"""
 
+    def _clone(self, parent):
+        clone = Element._clone(self, parent)
+        for child in self.children:
+            self._adopt_clone(clone, child._clone(clone))
+        return clone
+
+    def _adopt_clone(self, clone, child):
+        """Place a cloned *child* into *clone*.  Internal."""
+        raise NotImplementedError()
+
     @class_cloner
     def descent_validated_by(cls, *validators):
         """Return a class with descent validators set to *\*validators*.
@@ -172,6 +181,8 @@ class Sequence(Container, list):
 
     """
 
+    _clone_safe = True
+
     def __init__(self, value=Unspecified, **kw):
         Container.__init__(self, value, **kw)
         if not self.member_schema:
@@ -272,6 +283,9 @@ class Sequence(Container, list):
     def children(self):
         return iter(self)
 
+    def _adopt_clone(self, clone, child):
+        list.append(clone, child)
+
     @property
     def is_empty(self):
         return not any(True for _ in self.children)
@@ -283,6 +297,8 @@ class Sequence(Container, list):
             raise IndexError(name)
         return self[idx]
 
+    _path_steps = SequenceSteps
+
     def append(self, value):
         """Append *value* to end.
 
@@ -331,10 +347,23 @@ class Sequence(Container, list):
                 value = self.member_schema(value=value)
                 value.parent = self
         list.__setitem__(self, index, value)
+        self._reshaped()
 
     def __setslice__(self, i, j, value):
         self.__setitem__(slice(i, j), value)
 
+    def __delitem__(self, index):
+        list.__delitem__(self, index)
+        self._reshaped()
+
+    def __delslice__(self, i, j):
+        self.__delitem__(slice(i, j))
+
+    def pop(self, index=-1):
+        value = list.pop(self, index)
+        self._reshaped()
+        return value
+
     def remove(self, value):
         """Remove member with value *value*.
 
@@ -346,6 +375,15 @@ class Sequence(Container, list):
         if not isinstance(value, Element):
             value = self.member_schema(value=value)
         list.remove(self, value)
+        self._reshaped()
+
+    def sort(self, cmp=None, key=None, reverse=False):
+        list.sort(self, cmp, key, reverse)
+        self._reshaped()
+
+    def reverse(self):
+        list.reverse(self)
+        self._reshaped()
 
     def index(self, value):
         """Return first index of *value*.
@@ -471,6 +509,11 @@ class List(Sequence):
         """An iterator of the List's otherwise hidden Slots."""
         return list.__iter__(self)
 
+    def _adopt_clone(self, clone, child):
+        list.append(clone, self.slot_type(name=str(len(clone)).decode('ascii'),
+                                          parent=clone,
+                                          element=child))
+
     def append(self, value):
         list.append(self, self._new_slot(value))
 
@@ -536,65 +579,16 @@ class List(Sequence):
     def _renumber(self):
         for idx, slot in enumerate(self._slots):
             slot.name = str(idx).decode('ascii')
+        self._reshaped()
 
     @property
     def children(self):
         return iter(child.element for child in self._slots)
 
-    def _set_flat(self, pairs, sep):
-        del self[:]
-
-        if not pairs:
-            return
-
-        if self.name:
-            regex = re.compile(ur'^%s(\d+)(?:%s|$)' % (
-                re_uescape(self.name + sep), re_uescape(sep)), re.UNICODE)
-        else:
-            regex = re.compile(ur'^(\d+)(?:%s|$)' % (
-                re_uescape(sep)), re.UNICODE)
-
-        indexes = defaultdict(list)
-        prune = self.prune_empty
+    _flat_node = ListNode
 
-        for key, value in pairs:
-            if value == u'' and prune:
-                continue
-            m = regex.match(key)
-            if not m:
-                continue
-            try:
-                index = long(m.group(1))
-            except TypeError:
-                # Ignore keys with outrageously large indexes- they
-                # aren't valid data for us.
-                pass
-            else:
-                child_key = key[len(m.group(0)):] or None
-                indexes[index].append((child_key, value))
-
-        if not indexes:
-            return
-
-        # lossy: missing (or empty-valued) indexes are omitted.
-        #        the python indexes may not match the flat indexes
-        if prune:
-            for offset, index in enumerate(sorted(indexes)):
-                if offset == self.maximum_set_flat_members:
-                    break
-                slot = self._new_slot()
-                list.append(self, slot)
-                slot.element.set_flat(indexes[index], sep)
-        # lossless: elements are built up to the highest seen index or a
-        #           schema-configured maximum. flat + python indexes match.
-        else:
-            max_index = min(max(indexes) + 1, self.maximum_set_flat_members)
-            for index in xrange(0, max_index):
-                slot = self._new_slot()
-                list.append(self, slot)
-                flat = indexes.get(index, None)
-                if flat:
-                    slot.element.set_flat(flat, sep)
+    def _set_flat(self, pairs, sep):
+        decode_flat(self, pairs, sep, ListNode)
 
     def set_default(self):
         """set() the element to the schema default.
@@ -640,41 +634,10 @@ class Array(Sequence):
     prune_empty = True
     flattenable = False
 
+    _flat_node = ArrayNode
+
     def _set_flat(self, pairs, sep):
-        del self[:]
-        prune = self.prune_empty
-        child_name = self.member_schema.name
-
-        # TODO: some complexity snuck in below with the thought of supporting
-        # arrays of containers.  they're *not* working yet.
-        assert not issubclass(self.member_schema, Container), \
-               "Flattened Arrays are only supported for scalar child types."
-
-        if not self.name:
-            child_prefix = child_name or u''
-            for key, value in pairs:
-                if prune and value == u'' and key == child_prefix:
-                    continue
-                if key == u'':
-                    key = None
-                if child_name and key != child_name:
-                    continue
-                member = self.member_schema.from_flat([(key, value)])
-                self.append(member)
-        else:
-            regex = re.compile(ur'^(%s(?:%s|$))' % (
-                re_uescape(self.name), re_uescape(sep)), re.UNICODE)
-            for key, value in pairs:
-                m = regex.match(key)
-                if not m:
-                    continue
-                remainder = key[m.end():] or None
-                if child_name and not remainder:
-                    continue
-                elif prune and value == u'' and remainder == child_name:
-                    continue
-                member = self.member_schema.from_flat([(remainder, value)])
-                self.append(member)
+        decode_flat(self, pairs, sep, ArrayNode)
 
 
 class MultiValue(Array, Scalar):
@@ -702,6 +665,7 @@ class MultiValue(Array, Scalar):
     def _set_u(self, value):
         if not self:
             self.append(None)
+        self[0]._mark_dirty()
         self[0].u = value
 
     u = property(u, _set_u)
@@ -717,6 +681,7 @@ class MultiValue(Array, Scalar):
     def _set_value(self, value):
         if not self:
             self.append(None)
+        self[0]._mark_dirty()
         self[0].value = value
 
     value = property(value, _set_value)
@@ -734,6 +699,8 @@ class Mapping(Container, dict):
     field_schema = ()
     """TODO: doc field_schema"""
 
+    _clone_safe = True
+
     def __init__(self, value=Unspecified, **kw):
         Container.__init__(self, **kw)
         if not self.field_schema:
@@ -766,8 +733,14 @@ class Mapping(Container, dict):
         """Place blank children in all fields."""
         for member_schema in self.field_schema:
             key = member_schema.name
-            dict.__setitem__(
-                self, key, member_schema(parent=self))
+            dict.__setitem__(self, key, member_schema(parent=self))
+        self._reshaped()
+
+    def _clone(self, parent):
+        clone = Element._clone(self, parent)
+        for key, child in self.iteritems():
+            dict.__setitem__(clone, key, child._clone(clone))
+        return clone
 
     def popitem(self):
         raise TypeError('%s keys are immutable.' % type(self).__name__)
@@ -802,8 +775,11 @@ class Mapping(Container, dict):
 
     @property
     def children(self):
-        # order not guaranteed
-        return self.itervalues()
+        """An iterator of immediate child elements, in schema order."""
+        for field in self.field_schema:
+            child = dict.get(self, field.name)
+            if child is not None:
+                yield child
 
     def set(self, value):
         """TODO: doc set()"""
@@ -827,36 +803,10 @@ class Mapping(Container, dict):
                     ','.join(repr(key) for key in missing)))
         return converted
 
-    def _set_flat(self, pairs, sep):
-        if self.name is None:
-            possibles = pairs  # accept all
-        else:
-            possibles = []
-            prefix = self.name + sep
-            plen = len(prefix)
-            for key, value in pairs:
-                if key == prefix:
-                    # No flat representation of mappings, ignore.
-                    pass
-                if key.startswith(prefix):
-                    # accept child element
-                    possibles.append((key[plen:], value))
-
-        if not possibles:
-            return
+    _flat_node = MappingNode
 
-        for schema in self.field_schema:
-            field = schema.name
-            accum = []
-            for key, value in possibles:
-                if key.startswith(field):
-                    accum.append((key, value))
-            if accum:
-                if dict.__contains__(self, field):
-                    self[field].set_flat(accum, sep)
-                else:
-                    self[field] = schema()
-                    self[field].set_flat(accum, sep=sep)
+    def _set_flat(self, pairs, sep):
+        decode_flat(self, pairs, sep, MappingNode)
 
     def set_default(self):
         default = self.default_value
@@ -869,6 +819,8 @@ class Mapping(Container, dict):
     def _index(self, name):
         return self[name]
 
+    _path_steps = MappingSteps
+
     @property
     def u(self):
         """A string repr of the element."""
@@ -891,19 +843,20 @@ class Mapping(Container, dict):
 
     @assignable_class_property
     def field_schema_mapping(instance, cls):
-        """A name -> schema mapping generated from :attr:`field_schema`."""
-        if instance is not None:
-            field_schema = instance.field_schema
-        else:
-            field_schema = cls.field_schema
-        return dict((schema.name, schema) for schema in field_schema)
+        """A name -> schema mapping generated from :attr:`field_schema`.
+
+        The mapping is computed once per class and shared; treat it as
+        read-only.
+
+        """
+        if instance is not None and 'field_schema' in instance.__dict__:
+            return dict((schema.name, schema)
+                        for schema in instance.field_schema)
+        return schema_plan(cls).fields
 
     def _field_schema_for(self, key):
         """Return the schema for field ``*key* or None."""
-        for schema in self.field_schema:
-            if schema.name == key:
-                return schema
-        return None
+        return self.field_schema_mapping.get(key)
 
 
 class Dict(Mapping, dict):
@@ -1132,12 +1085,12 @@ class SparseDict(Dict):
 
     def _reset(self):
         dict.clear(self)
+        self._reshaped()
         for member_schema in self.field_schema:
             key = member_schema.name
             if self.minimum_fields is None or member_schema.optional:
                 continue
-            dict.__setitem__(
-                self, key, member_schema(parent=self))
+            dict.__setitem__(self, key, member_schema(parent=self))
 
     def __setitem__(self, key, value):
         schema = self._field_schema_for(key)
@@ -1147,8 +1100,9 @@ class SparseDict(Dict):
                                 (key, type(self).__name__, self.name))
             elif isinstance(value, schema):
                 dict.__setitem__(self, key, value)
-                return
-            dict.__setitem__(self, key, schema(value))
+            else:
+                dict.__setitem__(self, key, schema(value))
+            self._reshaped()
         elif isinstance(value, schema):
             value.parent = self
             dict.__setitem__(self, key, value)
@@ -1159,6 +1113,7 @@ class SparseDict(Dict):
         if self.minimum_fields is None:
             try:
                 dict.__delitem__(self, key)
+                self._reshaped()
                 return
             except KeyError:
                 if not self.may_contain(key):
@@ -1179,6 +1134,7 @@ class SparseDict(Dict):
             raise TypeError('May not delete required key %r on %s %r' %
                             (key, type(self).__name__, self.name))
         dict.__delitem__(self, key)
+        self._reshaped()
 
     def clear(self):
         self._reset()
@@ -1192,7 +1148,9 @@ class SparseDict(Dict):
         if self.minimum_fields == 'required' and not self[key].optional:
             raise TypeError('May not pop required key %r on %s %r' %
                             (key, type(self).__name__, self.name))
-        return dict.pop(self, key)
+        value = dict.pop(self, key)
+        self._reshaped()
+        return value
 
     def setdefault(self, key, default=None):
         if not self.may_contain(key):
@@ -0,0 +1,529 @@
+# -*- coding: utf-8; fill-column: 78 -*-
+"""Compiled decoding of flat ``(key, value)`` pairs into element trees.
+
+:meth:`~flatland.schema.base.Element.set_flat` routes each incoming pair to
+its destination element in a single pass over the input.  Each schema class
+compiles, once per separator, a small decoder node that knows how to match
+its own flattened name and how to hand the rest of a key to its children.
+Mappings hold a trie of their field names keyed by *sep*-delimited segments,
+so finding the child addressed by a key costs a few dict lookups no matter
+how many fields the mapping has.
+
+Pairs may also be fed one at a time with an :class:`ElementBuilder`, for
+instance as a request body is parsed, without first collecting them.
+
+The reverse direction is covered by :func:`urlencoded` and
+:func:`write_urlencoded`, which stream an element tree as
+``application/x-www-form-urlencoded`` bytes without building the flattened
+pairs in memory.
+
+"""
+import operator
+from urllib import quote_plus
+
+from .base import walk_flattenable
+from .plan import schema_plan
+
+
+__all__ = ['ElementBuilder', 'decode_flat', 'flat_node', 'urlencoded',
+           'write_urlencoded']
+
+# Instance attributes that change how an element decodes, as found in the
+# instance's __dict__; a per-instance name is held as _name.  Elements
+# carrying a per-instance override of one of these compile a private,
+# uncached node.
+_structural = ('_name', 'field_schema', 'member_schema')
+
+
+def flat_node(schema, sep, node_type=None):
+    """Return the compiled decoder node for *schema* and *sep*.
+
+    :param schema: an :class:`~flatland.schema.base.Element` class or
+      instance.  Nodes for classes are cached in the class's
+      :class:`~flatland.schema.plan.SchemaPlan`.
+
+    :param node_type: optional, the :class:`FlatNode` class to decode
+      with.  By default it is chosen by the class supplying the schema's
+      ``_set_flat``.
+
+    """
+    if not isinstance(schema, type):
+        overrides = vars(schema)
+        for attribute in _structural:
+            if attribute in overrides:
+                return _compile(schema, sep, node_type)
+        schema = type(schema)
+    cache = schema_plan(schema).flat_nodes
+    try:
+        node = cache[sep]
+    except KeyError:
+        node = cache[sep] = _compile(schema, sep)
+    if node_type is None or type(node) is node_type:
+        return node
+    try:
+        return cache[sep, node_type]
+    except KeyError:
+        node = cache[sep, node_type] = node_type(schema, sep)
+        return node
+
+
+def _compile(schema, sep, node_type=None):
+    if node_type is not None:
+        return node_type(schema, sep)
+    # Only trust the decoder declared by the class that also supplies the
+    # schema's _set_flat; anything else customized set_flat on its own.
+    cls = schema if isinstance(schema, type) else type(schema)
+    for cls in cls.__mro__:
+        if '_set_flat' in cls.__dict__:
+            node_type = cls.__dict__.get('_flat_node', OpaqueNode)
+            break
+    else:                                                 # pragma: nocover
+        node_type = OpaqueNode
+    return node_type(schema, sep)
+
+
+def split_key(key, sep):
+    """Return *key* as a tuple of *sep*-delimited segments, or None."""
+    if key is None:
+        return ()
+    try:
+        return tuple(key.split(sep))
+    except (AttributeError, TypeError):
+        return None
+
+
+def decode_flat(element, pairs, sep, node_type=None):
+    """Set *element* and its children from an iterable of flat *pairs*.
+
+    *node_type* is as for :func:`flat_node`.  Implementations of
+    ``_set_flat`` pass their own, so that subclasses overriding
+    ``_set_flat`` can delegate to them.
+
+    """
+    builder = ElementBuilder(element, sep, node_type)
+    builder.extend(pairs)
+    builder.close()
+
+
+class ElementBuilder(object):
+    """Sets an element from flat pairs fed one at a time.
+
+    Equivalent to :meth:`~flatland.schema.base.Element.set_flat`, but pairs
+    can be supplied as they become available, such as while a urlencoded or
+    multipart request body is parsed::
+
+      builder = ElementBuilder(form)
+      for key, value in parse_incrementally(body):
+          builder.feed(key, value)
+      builder.close()
+
+    Pairs are routed to their elements as they are fed; nothing beyond the
+    element tree itself is retained, other than the pairs of containers
+    with a custom ``set_flat``, which are set when the builder is closed.
+    Lists are populated on close, too, from members held no longer than
+    their :attr:`~flatland.schema.containers.List.maximum_set_flat_members`
+    allows.
+
+    :param element: the :class:`~flatland.schema.base.Element` to set.
+      As with :meth:`~flatland.schema.base.Element.set_flat`, its value
+      is not reset first: elements that no pair names keep their previous
+      values, and a list or array is rebuilt only from its own pairs when
+      at least one names it, or when it is *element* itself.
+    :param sep: the separator used in flattened keys.
+    :param node_type: optional, as for :func:`flat_node`.
+
+    """
+
+    def __init__(self, element, sep=u'_', node_type=None):
+        self.element = element
+        self.sep = sep
+        self._node = flat_node(element, sep, node_type)
+        self._decoding = Decoding(sep)
+        self._node.begin(self._decoding, element)
+
+    def feed(self, key, value):
+        """Apply a single flat *key*, *value* pair."""
+        self.extend(((key, value),))
+
+    def extend(self, pairs):
+        """Apply each ``(key, value)`` in the iterable *pairs*."""
+        decoding = self._decoding
+        if decoding is None:
+            raise RuntimeError('ElementBuilder is closed.')
+        element, node, sep = self.element, self._node, self.sep
+        for key, value in pairs:
+            segments = split_key(key, sep)
+            if segments is None:
+                continue
+            position = node.consume(segments, 0)
+            if position >= 0:
+                node.feed(decoding, element, segments, position, value)
+
+    def close(self):
+        """Complete the element and return it.  No more pairs may be fed."""
+        decoding, self._decoding = self._decoding, None
+        if decoding is not None:
+            decoding.finish()
+        return self.element
+
+
+class Decoding(object):
+    """Bookkeeping for a single decoding run."""
+
+    __slots__ = 'sep', 'assigned', 'pending'
+
+    def __init__(self, sep):
+        self.sep = sep
+        # ids of scalars that have received their value; the first pair wins
+        self.assigned = set()
+        # id(element) -> [node, element, state] for deferred containers
+        self.pending = {}
+
+    def state_for(self, node, element):
+        """Return *node*'s state for *element*, starting it if needed."""
+        try:
+            return self.pending[id(element)][2]
+        except KeyError:
+            state = node.start(element)
+            self.pending[id(element)] = [node, element, state]
+            return state
+
+    def retire(self, element):
+        """Forget *element*, dropped mid-run, and everything below it.
+
+        Its ids may be reused by elements created later in the run.
+
+        """
+        assigned, pending = self.assigned, self.pending
+        stack = [element]
+        while stack:
+            element = stack.pop()
+            assigned.discard(id(element))
+            entry = pending.pop(id(element), None)
+            if entry is not None:
+                node, element, state = entry
+                stack.extend(node.held(state))
+            stack.extend(element.children)
+
+    def finish(self):
+        """Complete all deferred containers touched during the run."""
+        pending, self.pending = self.pending, {}
+        for node, element, state in pending.itervalues():
+            node.finish(element, state, self.sep)
+
+
+class FlatNode(object):
+    """Decodes the flat pairs addressed to one position in a schema."""
+
+    def __init__(self, schema, sep):
+        self.schema = schema
+        self.name = schema.name
+        if self.name is None:
+            self.path = ()
+        else:
+            self.path = tuple(self.name.split(sep))
+
+    def consume(self, segments, position):
+        """Match this node's name at *position*.
+
+        :returns: the position following the name, or -1 if *segments* do not
+          carry this node's name at *position*.
+
+        """
+        path = self.path
+        if not path:
+            return position
+        end = position + len(path)
+        if len(path) == 1:
+            if position < len(segments) and segments[position] == path[0]:
+                return end
+            return -1
+        if segments[position:end] == path:
+            return end
+        return -1
+
+    def begin(self, decoding, element):
+        """Prepare *element* as the root of a decoding run."""
+
+    def feed(self, decoding, element, segments, position, value):
+        """Apply one pair, whose key continues at *position*, to *element*."""
+        raise NotImplementedError()
+
+    def start(self, element):
+        """Return per-run state for a deferred container."""
+        raise NotImplementedError()
+
+    def finish(self, element, state, sep):
+        """Complete a deferred container after all pairs have been fed."""
+        raise NotImplementedError()
+
+    def held(self, state):
+        """Return the elements *state* holds outside of the element tree."""
+        return ()
+
+
+class ScalarNode(FlatNode):
+    """Sets an element from the first pair that names it exactly."""
+
+    def feed(self, decoding, element, segments, position, value):
+        if position != len(segments):
+            return
+        assigned = decoding.assigned
+        if id(element) not in assigned:
+            assigned.add(id(element))
+            element.set(value)
+
+
+class MappingNode(FlatNode):
+    """Routes pairs to named fields through a trie of field names."""
+
+    def __init__(self, schema, sep):
+        FlatNode.__init__(self, schema, sep)
+        self.fields = {}
+        self.trie = {}
+        for field in schema.field_schema:
+            name = field.name
+            if name is None:
+                continue
+            self.fields[name] = field
+            branch = self.trie
+            for segment in name.split(sep):
+                branch = branch.setdefault(segment, {})
+            # segments are always strings, None marks a complete field name
+            branch[None] = name
+
+    def feed(self, decoding, element, segments, position, value):
+        branch, sep = self.trie, decoding.sep
+        for index in xrange(position, len(segments)):
+            branch = branch.get(segments[index])
+            if branch is None:
+                return
+            name = branch.get(None)
+            if name is None:
+                continue
+            child = dict.get(element, name)
+            if child is None:
+                child = self.fields[name]()
+                child.parent = element
+                dict.__setitem__(element, name, child)
+            flat_node(type(child), sep).feed(
+                decoding, child, segments, index + 1, value)
+
+
+class ListNode(FlatNode):
+    """Collects indexed members, slotting them in once decoding finishes."""
+
+    def begin(self, decoding, element):
+        decoding.state_for(self, element)
+
+    def start(self, element):
+        del element[:]
+        return _ListState(element)
+
+    def feed(self, decoding, element, segments, position, value):
+        state = decoding.state_for(self, element)
+        if state.prune and value == u'':
+            return
+        if position >= len(segments):
+            return
+        digits = segments[position]
+        if not digits.isdigit():
+            return
+        try:
+            index = long(digits)
+        except ValueError:
+            return
+
+        position += 1
+        if position == len(segments) - 1 and not segments[position]:
+            # 'list_0_' addresses the member just as 'list_0' does
+            position += 1
+
+        member = state.member(index, decoding)
+        if member is None:
+            return
+        node = flat_node(type(member), decoding.sep)
+        position = node.consume(segments, position)
+        if position >= 0:
+            node.feed(decoding, member, segments, position, value)
+
+    def finish(self, element, state, sep):
+        members = state.members
+        if state.prune:
+            indexes = sorted(members)
+        else:
+            indexes = xrange(0, min(state.highest + 1, state.limit))
+        for index in indexes:
+            member = members.get(index)
+            if member is None:
+                member = element.member_schema()
+            list.append(element, element._new_slot(member))
+
+    def held(self, state):
+        return state.members.values()
+
+
+class _ListState(object):
+    __slots__ = 'schema', 'prune', 'limit', 'members', 'highest'
+
+    def __init__(self, element):
+        self.schema = element.member_schema
+        self.prune = element.prune_empty
+        self.limit = element.maximum_set_flat_members
+        self.members = {}
+        self.highest = -1
+
+    def member(self, index, decoding):
+        """Return the member element at flat *index*, or None if dropped."""
+        members = self.members
+        member = members.get(index)
+        if member is not None:
+            return member
+        if index > self.highest:
+            self.highest = index
+        if not self.prune:
+            # the list is filled up to the highest index, within the limit
+            if index >= self.limit:
+                return None
+        elif len(members) >= self.limit:
+            # keep only the lowest indexes, as the pruned list will
+            highest = max(members)
+            if index > highest:
+                return None
+            decoding.retire(members.pop(highest))
+        member = members[index] = self.schema()
+        return member
+
+
+class ArrayNode(FlatNode):
+    """Appends one member per matching pair, in input order."""
+
+    def begin(self, decoding, element):
+        decoding.state_for(self, element)
+
+    def start(self, element):
+        # TODO: some complexity snuck in below with the thought of supporting
+        # arrays of containers.  they're *not* working yet.
+        from .containers import Container
+        assert not issubclass(element.member_schema, Container), \
+               "Flattened Arrays are only supported for scalar child types."
+        del element[:]
+        return None
+
+    def feed(self, decoding, element, segments, position, value):
+        decoding.state_for(self, element)
+        if position < len(segments):
+            key = decoding.sep.join(segments[position:])
+        else:
+            key = None
+        schema = element.member_schema
+        child_name = schema.name
+        prune = element.prune_empty
+
+        if not self.path:
+            if prune and value == u'' and key == (child_name or u''):
+                return
+            if key == u'':
+                key = None
+            if child_name and key != child_name:
+                return
+        else:
+            key = key or None
+            if child_name and not key:
+                return
+            elif prune and value == u'' and key == child_name:
+                return
+        element.append(schema.from_flat([(key, value)]))
+
+    def finish(self, element, state, sep):
+        pass
+
+
+class OpaqueNode(FlatNode):
+    """Buffers pairs for schema with a custom :meth:`_set_flat`."""
+
+    def begin(self, decoding, element):
+        decoding.state_for(self, element)
+
+    def consume(self, segments, position):
+        # the custom implementation does its own name matching
+        return position + len(self.path)
+
+    def feed(self, decoding, element, segments, position, value):
+        start = position - len(self.path)
+        if start < len(segments):
+            key = decoding.sep.join(segments[start:])
+        else:
+            key = None
+        decoding.state_for(self, element).append((key, value))
+
+    def start(self, element):
+        return []
+
+    def finish(self, element, state, sep):
+        element.set_flat(state, sep)
+
+
+def urlencoded(element, sep=u'_', encoding='utf-8',
+               value=operator.attrgetter('u'), chunk_size=8192):
+    """Generate the urlencoded form of an element hierarchy.
+
+    Produces the pairs of :meth:`~flatland.schema.base.Element.flatten` as
+    ``application/x-www-form-urlencoded`` byte strings of roughly
+    *chunk_size* bytes, ready to be written out or returned as a WSGI
+    response body.  Names are quoted once per schema and extended on the
+    way down the tree, so only values are quoted per element.
+
+    :param value: a 1-arg callable returning the Unicode (or byte string)
+      value of an element.  Defaults to the :attr:`.u` of each element.
+
+    """
+    quoted_sep = quote_plus(sep.encode(encoding))
+
+    def join(prefix, element, sep):
+        name = _quoted_name(element, encoding)
+        return name if prefix is None else prefix + quoted_sep + name
+
+    prefix = element._flattened_prefix(sep)
+    if prefix is not None:
+        prefix = quote_plus(prefix.encode(encoding))
+
+    chunk, size, amp = [], 0, ''
+    for name, child in walk_flattenable(element, prefix, join, sep):
+        data = value(child)
+        if isinstance(data, unicode):
+            data = data.encode(encoding)
+        pair = '%s%s=%s' % (amp, name or '', quote_plus(data))
+        amp = '&'
+        chunk.append(pair)
+        size += len(pair)
+        if size >= chunk_size:
+            yield ''.join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield ''.join(chunk)
+
+
+def write_urlencoded(element, stream, sep=u'_', encoding='utf-8',
+                     value=operator.attrgetter('u'), chunk_size=8192):
+    """Write the urlencoded form of an element hierarchy to *stream*.
+
+    *stream* may be any object with a ``write`` method accepting byte
+    strings.  See :func:`urlencoded` for the other arguments.
+
+    """
+    write = stream.write
+    for chunk in urlencoded(element, sep, encoding, value, chunk_size):
+        write(chunk)
+
+
+def _quoted_name(element, encoding):
+    if '_name' in element.__dict__:
+        # renamed instances and List slots
+        return quote_plus(element.name.encode(encoding))
+    cache = schema_plan(type(element)).quoted_names
+    try:
+        return cache[encoding]
+    except KeyError:
+        quoted = cache[encoding] = quote_plus(element.name.encode(encoding))
+        return quoted
@@ -1,13 +1,13 @@
 # -*- coding: utf-8; fill-column: 78 -*-
 """Class attribute-style declarative schema construction."""
-from .base import Element
+from .base import Element, _MetaElement
 from .containers import Dict
 
 
 __all__ = 'Form',
 
 
-class _MetaForm(type):
+class _MetaForm(_MetaElement):
     """Allows fields to be specified as class attribute declarations.
 
     Processes class declarations of the form:
@@ -48,7 +48,7 @@ class _MetaForm(type):
 
         # the new type's field_schema is the final result of all this
         members['field_schema'] = fields.elements
-        return type.__new__(self, class_name, bases, members)
+        return _MetaElement.__new__(self, class_name, bases, members)
 
 
 class _ElementCollection(object):
@@ -1,16 +1,20 @@
+from __future__ import with_statement
+import fnmatch
 import re
-from flatland.util import symbol
+from flatland.util import symbol, threading
+from .plan import schema_plan
 
 
-__all__ = ['pathexpr']
+__all__ = ['BoundPath', 'PathExpression', 'pathexpr']
 
-expression_cache = {}
 max_cache_size = 1024
 
 TOP = symbol('TOP')
 UP = symbol('UP')
 SLICE = symbol('SLICE')
 NAME = symbol('NAME')
+GLOB = symbol('GLOB')
+DESCEND = symbol('DESCEND')
 
 _tokenize_re = re.compile(r"""
     (
@@ -30,64 +34,286 @@ _tokenize_re = re.compile(r"""
       \[
     )
     """, re.VERBOSE)
-_unescape_re = re.compile(r"\\(/|\[|\]|\.)")
+_unescape_re = re.compile(r"\\(/|\[|\]|\.|\*|\?)")
+_glob_re = re.compile(r"(?<!\\)[*?]")
+_glob_escape_re = re.compile(r"\\([/.\[\]*?])")
 
 
-def pathexpr(expr):
-    if not isinstance(expr, unicode):
+def pathexpr(expr, pin=False):
+    """Return the compiled :class:`PathExpression` for string *expr*.
+
+    Compiled expressions are kept in :data:`expression_cache`.
+
+    :param pin: if true, the expression is never evicted from the cache.
+      Pin the fixed paths a schema declares, leaving the bounded space to
+      paths built at runtime.
+
+    """
+    if isinstance(expr, PathExpression):
+        if not pin:
+            return expr
+        expr = expr.expr
+    elif not isinstance(expr, unicode):
         expr = unicode(expr)
-    try:
-        return expression_cache[expr]
-    except KeyError:
-        compiled = PathExpression(expr)
-        if len(expression_cache) < max_cache_size:
-            return expression_cache.setdefault(expr, compiled)
-        else:
-            return compile
+    if pin:
+        return expression_cache.pin(expr)
+    return expression_cache.get(expr)
+
+
+class ExpressionCache(object):
+    """A thread-safe, least-recently-used cache of compiled expressions.
+
+    :param max_size: the most unpinned expressions kept.  Once full, the
+      least recently used expression is evicted to make room for a new one.
+      Pinned expressions do not count towards the limit.
+
+    :param compiler: optional, a callable returning the compiled form of a
+      cache key.  Defaults to :class:`PathExpression`.
+
+    Lookups are counted in :attr:`hits` and :attr:`misses`, and evicted
+    expressions in :attr:`evictions`.
+
+    """
+
+    def __init__(self, max_size=max_cache_size, compiler=None):
+        self._max_size = max_size
+        self._compiler = compiler or PathExpression
+        self._lock = threading.Lock()
+        # key -> [previous, next, key, compiled], linked in order of use
+        # with the least recently used first after the root sentinel
+        self._entries = {}
+        self._root = root = []
+        root[:] = [root, root, None, None]
+        self._pinned = {}
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, expr):
+        """Return the compiled *expr*, compiling and caching it if needed."""
+        with self._lock:
+            compiled = self._pinned.get(expr)
+            if compiled is not None:
+                self.hits += 1
+                return compiled
+            link = self._entries.get(expr)
+            if link is not None:
+                root = self._root
+                last = root[0]
+                if link is not last:
+                    # move to the most recently used end
+                    previous, next = link[0], link[1]
+                    previous[1], next[0] = next, previous
+                    link[0], link[1] = last, root
+                    last[1] = root[0] = link
+                self.hits += 1
+                return link[3]
+            self.misses += 1
+        compiled = self._compiler(expr)
+        with self._lock:
+            if expr in self._pinned:
+                return self._pinned[expr]
+            if expr not in self._entries and self._max_size > 0:
+                self._insert(expr, compiled)
+        return compiled
+
+    def pin(self, expr):
+        """Compile *expr* if needed and exempt it from eviction."""
+        with self._lock:
+            compiled = self._pinned.get(expr)
+            if compiled is None:
+                link = self._entries.pop(expr, None)
+                if link is not None:
+                    self._unlink(link)
+                    compiled = link[3]
+        if compiled is None:
+            compiled = self._compiler(expr)
+        with self._lock:
+            return self._pinned.setdefault(expr, compiled)
+
+    def unpin(self, expr):
+        """Return pinned *expr* to the evictable cache."""
+        with self._lock:
+            compiled = self._pinned.pop(expr, None)
+            if compiled is not None and self._max_size > 0:
+                self._insert(expr, compiled)
+
+    def clear(self):
+        """Drop all unpinned expressions and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._root[:] = [self._root, self._root, None, None]
+            self.hits = self.misses = self.evictions = 0
+
+    def _get_max_size(self):
+        return self._max_size
+
+    def _set_max_size(self, max_size):
+        with self._lock:
+            self._max_size = max_size
+            self._shrink()
+
+    max_size = property(_get_max_size, _set_max_size)
+    del _get_max_size, _set_max_size
+
+    def _insert(self, expr, compiled):
+        link = [None, None, expr, compiled]
+        self._entries[expr] = link
+        self._append(link)
+        self._shrink()
+
+    def _append(self, link):
+        root = self._root
+        last = root[0]
+        link[0], link[1] = last, root
+        last[1] = root[0] = link
+
+    def _unlink(self, link):
+        previous, next = link[0], link[1]
+        previous[1], next[0] = next, previous
+
+    def _shrink(self):
+        entries, root = self._entries, self._root
+        while entries and len(entries) > self._max_size:
+            oldest = root[1]
+            self._unlink(oldest)
+            del entries[oldest[2]]
+            self.evictions += 1
+
+    def __contains__(self, expr):
+        return expr in self._pinned or expr in self._entries
+
+    def __len__(self):
+        return len(self._pinned) + len(self._entries)
+
+    def __repr__(self):
+        return ('<ExpressionCache %s/%s pinned=%s hits=%s misses=%s '
+                'evictions=%s>' % (
+                    len(self._entries), self._max_size, len(self._pinned),
+                    self.hits, self.misses, self.evictions))
 
 
 class PathExpression(object):
+    """A compiled path.
+
+    :param expr: the path string.
+
+    :param ops: optional, the ``(OP, data)`` pairs of *expr*.  If omitted,
+      *expr* is tokenized.
+
+    Calling the expression with an element returns the list of matching
+    elements.  The expression is :meth:`bound<bind>` to the class of each
+    element it is called with, once per class.  Bindings are kept in the
+    class's :func:`~flatland.schema.plan.schema_plan`, at most
+    :data:`max_cache_size` per class, and live no longer than the class.
+
+    """
 
-    def __init__(self, expr):
+    def __init__(self, expr, ops=None):
         self.expr = expr
-        self.ops = tokenize(expr)
+        if ops is None:
+            ops = tokenize(expr)
+        self.ops = ops
+        self.absolute = bool(ops) and ops[0][0] is TOP
+        names = ops[1:] if self.absolute else ops
+        if all(op is NAME for op, data in names):
+            #: The element names of an expression that only names elements.
+            self.names = tuple(data for op, data in names)
+        else:
+            self.names = None
+        # Identifies the steps, and so the bindings, of the expression
+        # across recompilations: the ops are those of tokenizing expr
+        # unless given, and given ops only ever name elements.
+        self._key = (expr, self.absolute, self.names)
 
     def __call__(self, element, strict=False):
+        if self.absolute:
+            element = element.root
         found = []
-        contexts = [(self.ops, element)]
-
-        for _ops, el in contexts:
-            for idx in xrange(len(_ops)):
-                op, data = _ops[idx]
-                if op is TOP:
-                    el = el.root
-                elif op is UP:
-                    if el.parent:
-                        el = el.parent
-                elif op is NAME:
-                    try:
-                        el = el._index(data)
-                    except (LookupError, TypeError):
-                        if strict:
-                            if el.name:
-                                type_ = '%s element %r' % (
-                                    el.__class__.__name__, el.name)
-                            else:
-                                type_ = 'Unnamed element %s' % (
-                                    el.__class__.__name__)
-                            raise LookupError(
-                                "%s has no child %r in expression %r" % (
-                                    type_, data, self.expr))
-                        break
-                elif op is SLICE:
-                    children = list(el.children)[data]
-                    contexts.extend((_ops[idx + 1:], child)
-                                    for child in children)
-                    break
-            else:
-                found.append(el)
+        self._bound(element)._walk(0, element, strict, found)
         return found
 
+    def iterate(self, element, strict=False):
+        """Generate the elements matching the expression, lazily.
+
+        Matches are produced in the same order as by calling the
+        expression, but the tree is searched only as far as the consumer
+        reads.
+
+        """
+        if self.absolute:
+            element = element.root
+        return self._bound(element)._iter(0, element, strict)
+
+    def _bound(self, element):
+        schema = type(element)
+        bound_paths = schema_plan(schema).bound_paths
+        try:
+            return bound_paths[self._key]
+        except KeyError:
+            pass
+        bound = self.bind(schema, strict=False)
+        while len(bound_paths) >= max_cache_size:
+            try:
+                # any will do; the bindings in use are soon bound again
+                bound_paths.popitem()
+            except KeyError:
+                break
+        return bound_paths.setdefault(self._key, bound)
+
+    def bind(self, schema, strict=True):
+        """Return a :class:`BoundPath` resolver specialized for *schema*.
+
+        :param schema: the :class:`~flatland.schema.base.Element` class of
+          the elements the expression will be evaluated from, or for
+          absolute expressions, the class of the root element.
+
+        :param strict: if true, raise :exc:`LookupError` if the path names
+          a child that *schema* can never have.  Otherwise the step is left
+          to be checked at evaluation time.
+
+        Steps through mappings and sequences of known schema become direct
+        lookups and slices.  Steps whose schema can not be known in
+        advance, such as those following a ``..``, are interpreted when
+        they are reached.
+
+        """
+        steps = []
+        ops = self.ops[1:] if self.absolute else self.ops
+        for op, data in ops:
+            if op is UP:
+                schema = None
+                steps.append((None, False, data, _up, data, _up))
+                continue
+            elif op is GLOB:
+                schema = None
+                match = re.compile(fnmatch.translate(data)).match
+                steps.append((None, True, match, _glob, match, _glob))
+                continue
+            elif op is DESCEND:
+                schema = None
+                steps.append((None, True, data, _descend, data, _descend))
+                continue
+            fanout = op is SLICE
+            generic = _slice_children if fanout else _index_child
+            planner = schema is not None and _path_steps_for(schema)
+            if not planner:
+                compiled = None
+            elif fanout:
+                compiled = planner.children(schema, data)
+            else:
+                compiled = planner.child(schema, data)
+                if compiled is None and strict:
+                    raise LookupError(
+                        "%s has no child %r in expression %r" % (
+                            schema.__name__, data, self.expr))
+            if compiled is None:
+                steps.append((None, fanout, data, generic, data, generic))
+                schema = None
+            else:
+                fast, argument, child_schema = compiled
+                steps.append((schema, fanout, data, fast, argument, generic))
+                schema = child_schema
+        return BoundPath(self, steps)
+
     def __unicode__(self):
         return self.expr
 
@@ -95,7 +321,206 @@ class PathExpression(object):
         return 'pathexpr(%r)' % self.__unicode__()
 
 
-# TODO: glob syntax  foo/*/baz  sneep/_*/squiznart
+class BoundPath(object):
+    """A :class:`PathExpression` specialized for one schema.
+
+    Call with an element of the bound schema, and optionally *strict*, as
+    with the expression itself.  Elements of other types are still
+    resolved, by interpreting the path.
+
+    """
+
+    def __init__(self, expression, steps):
+        self.expression = expression
+        self.steps = tuple(steps)
+
+    def __call__(self, element, strict=False):
+        if self.expression.absolute:
+            element = element.root
+        found = []
+        self._walk(0, element, strict, found)
+        return found
+
+    def iterate(self, element, strict=False):
+        """Generate the matching elements lazily."""
+        if self.expression.absolute:
+            element = element.root
+        return self._iter(0, element, strict)
+
+    def _walk(self, start, element, strict, found):
+        steps = self.steps
+        for index in xrange(start, len(steps)):
+            schema, fanout, data, fast, argument, generic = steps[index]
+            try:
+                if type(element) is schema:
+                    child = fast(element, argument)
+                else:
+                    child = generic(element, data)
+            except (LookupError, TypeError):
+                child = None
+            if fanout:
+                for member in child or ():
+                    self._walk(index + 1, member, strict, found)
+                return
+            if child is None:
+                if strict:
+                    raise _no_child(element, data, self.expression.expr)
+                return
+            element = child
+        found.append(element)
+
+    def _iter(self, start, element, strict):
+        # a generator twin of _walk
+        steps = self.steps
+        for index in xrange(start, len(steps)):
+            schema, fanout, data, fast, argument, generic = steps[index]
+            try:
+                if type(element) is schema:
+                    child = fast(element, argument)
+                else:
+                    child = generic(element, data)
+            except (LookupError, TypeError):
+                child = None
+            if fanout:
+                for member in child or ():
+                    for found in self._iter(index + 1, member, strict):
+                        yield found
+                return
+            if child is None:
+                if strict:
+                    raise _no_child(element, data, self.expression.expr)
+                return
+            element = child
+        yield element
+
+    def __repr__(self):
+        return '<BoundPath %r>' % self.expression.expr
+
+
+def _path_steps_for(schema):
+    # Only trust the planner declared by the class that also supplies the
+    # schema's _index; anything else customized child lookup on its own.
+    for cls in schema.__mro__:
+        if '_index' in cls.__dict__:
+            return cls.__dict__.get('_path_steps')
+    return None                                           # pragma: nocover
+
+
+def _up(element, data):
+    parent = element.parent
+    return element if parent is None else parent
+
+
+def _index_child(element, name):
+    return element._index(name)
+
+
+def _slice_children(element, selection):
+    return list(element.children)[selection]
+
+
+def _no_children(element, selection):
+    return ()
+
+
+def _glob(element, match):
+    planner = _path_steps_for(type(element)) or ScalarSteps
+    return (child for name, child in planner.items(element)
+            if name is not None and match(name))
+
+
+def _descend(element, data):
+    # the element and all of its descendants, depth first
+    stack = [element]
+    while stack:
+        element = stack.pop()
+        yield element
+        children = list(element.children)
+        children.reverse()
+        stack.extend(children)
+
+
+def _no_child(element, name, expr):
+    if element.name:
+        type_ = '%s element %r' % (element.__class__.__name__, element.name)
+    else:
+        type_ = 'Unnamed element %s' % element.__class__.__name__
+    return LookupError("%s has no child %r in expression %r" % (
+        type_, name, expr))
+
+
+class ScalarSteps(object):
+    """Path steps for elements without children.
+
+    Steps are ``(function, argument, child schema)`` triples.  The function
+    is called with an element of the schema and the argument, and returns
+    the child or a list of children.  It may return None or raise
+    :exc:`LookupError` if the element lacks the child.  The child schema is
+    None if it is not known in advance.
+
+    """
+
+    @staticmethod
+    def child(schema, name):
+        """Return the step to a named child, or None if no element of
+        *schema* can have the child."""
+        return None
+
+    @staticmethod
+    def children(schema, selection):
+        """Return the step to a slice of the children."""
+        return _no_children, selection, None
+
+    @staticmethod
+    def items(element):
+        """Return an iterable of ``(path name, child)`` for *element*."""
+        return ((child.name, child) for child in element.children)
+
+
+class MappingSteps(ScalarSteps):
+    """Path steps for mappings, looking children up by field name."""
+
+    @staticmethod
+    def child(schema, name):
+        fields = schema_plan(schema).fields
+        if name not in fields:
+            return None
+        return dict.get, name, fields[name]
+
+    @staticmethod
+    def children(schema, selection):
+        return _slice_children, selection, None
+
+
+class SequenceSteps(ScalarSteps):
+    """Path steps for sequences, indexing and slicing in place."""
+
+    @staticmethod
+    def child(schema, name):
+        try:
+            index = int(name)
+        except (TypeError, ValueError):
+            return None
+        return schema.__getitem__, index, _member_schema(schema)
+
+    @staticmethod
+    def children(schema, selection):
+        return schema.__getitem__, selection, _member_schema(schema)
+
+    @staticmethod
+    def items(element):
+        return ((unicode(index), child)
+                for index, child in enumerate(element.children))
+
+
+def _member_schema(schema):
+    member_schema = schema.member_schema
+    return member_schema if isinstance(member_schema, type) else None
+
+
+#: The shared cache of compiled path expressions used by :func:`pathexpr`.
+expression_cache = ExpressionCache()
+
 
 def tokenize(path):
     """Parse *path* and return a list of (OP, data) pairs."""
@@ -128,6 +553,14 @@ def tokenize(path):
             tokens.append((previous[0], last))
             continue
 
+        # foo/**/bar -> 'foo', descend, 'bar'
+        elif token == '**':
+            tokens.append((DESCEND, None))
+
+        # foo/*/bar or foo/_*/bar -> 'foo', glob, 'bar'
+        elif _glob_re.search(token):
+            tokens.append((GLOB, _glob_escape_re.sub(_glob_literal, token)))
+
         # foo/bar/baz[bogus] -> 'foo', 'bar', 'baz[bogus]'
         else:
             name = _unescape_re.sub(r'\1', token)
@@ -141,6 +574,12 @@ def tokenize(path):
     return _canonicalize(tokens)
 
 
+def _glob_literal(match):
+    char = match.group(1)
+    # fnmatch matches its special characters literally inside brackets
+    return '[%s]' % char if char in '*?[' else char
+
+
 def _canonicalize(tokens):
     """Collapse redundant steps from token lists containing UP ops."""
     canonical = []
@@ -151,7 +590,7 @@ def _canonicalize(tokens):
         last = canonical[-1][0]
         if last is TOP:
             continue
-        elif last is not UP:
+        elif last is not UP and last is not DESCEND:
             canonical.pop()
         else:
             canonical.append(token)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8; fill-column: 78 -*-
+"""Per-class schema plans.
+
+Element classes are configured once, by class declaration or by
+:meth:`~flatland.schema.base.Element.named`,
+:meth:`~flatland.schema.base.Element.using` and friends, and then
+instantiated many times.  A :class:`SchemaPlan` gathers the facts that every
+instance would otherwise re-derive from the class: the field lookup table of a
+mapping and the compiled decoders used by
+:meth:`~flatland.schema.base.Element.set_flat`.
+
+"""
+
+
+__all__ = ['SchemaPlan', 'discard_plan', 'schema_plan']
+
+# The number of plans built so far, and of the times all were discarded.
+_built = 0
+_generation = 0
+
+
+def schema_plan(schema):
+    """Return the :class:`SchemaPlan` of element class *schema*.
+
+    Plans are built on first request and cached on the class itself.
+    Subclasses, including those produced by ``named()``, ``using()`` and
+    ``of()``, get plans of their own.  Assigning to a public attribute of
+    a class that plans may describe discards them all; see
+    :func:`schema_reconfigured`.
+
+    """
+    global _built
+    plan = schema.__dict__.get('_schema_plan')
+    if plan is None or plan.generation != _generation:
+        _built += 1
+        plan = SchemaPlan(schema)
+        setattr(schema, '_schema_plan', plan)
+    return plan
+
+
+def plan_epoch():
+    """Return a marker that changes each time a plan is built."""
+    return _built
+
+
+def schema_reconfigured(schema, epoch):
+    """Discard the plans that may describe *schema*, which was changed.
+
+    *epoch* is the :func:`plan_epoch` when *schema* was created.  The plans
+    of its subclasses and of mappings holding it as a field describe it
+    too, so unless no plan has been built since *schema* was created, as
+    with classes configured by ``named()`` or ``using()``, every plan is
+    rebuilt on its next request.
+
+    """
+    global _generation
+    if epoch != _built:
+        _generation += 1
+
+
+def discard_plan(schema):
+    """Drop the cached plan of *schema*, if any.
+
+    Needed only when a class is reconfigured in place after it has been used,
+    as :meth:`~flatland.schema.compound.Compound.__compound_init__` may do.
+
+    """
+    try:
+        delattr(schema, '_schema_plan')
+    except AttributeError:
+        pass
+
+
+class SchemaPlan(object):
+    """Facts about an element class, computed once and shared by instances.
+
+    Plans are treated as immutable once built; the only state that grows
+    afterwards are memos: the per-separator cache of compiled set_flat
+    decoders, the prototype cloned by ``from_defaults()``, path
+    expressions bound to the schema and the quoted names used when
+    urlencoding.
+
+    """
+
+    __slots__ = ('schema', 'generation', 'fields', 'flat_nodes',
+                 'defaults_prototype', 'bound_paths', 'quoted_names')
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.generation = _generation
+
+        #: A name -> schema mapping of a mapping's :attr:`field_schema`.
+        self.fields = dict((field.name, field)
+                           for field in getattr(schema, 'field_schema', ()))
+
+        #: sep -> compiled :class:`~flatland.schema.flat.FlatNode`
+        self.flat_nodes = {}
+
+        #: A parentless element with defaults applied for
+        #: ``from_defaults()`` to clone, False if the schema can not be
+        #: safely built by cloning, or None until first needed.
+        self.defaults_prototype = None
+
+        #: path expression key -> its
+        #: :class:`~flatland.schema.paths.BoundPath` for the schema, at most
+        #: :data:`~flatland.schema.paths.max_cache_size` of them
+        self.bound_paths = {}
+
+        #: encoding -> the schema's name, encoded and quoted for urlencoding
+        self.quoted_names = {}
+
+    def __repr__(self):
+        return '<SchemaPlan for %s>' % self.schema.__name__
+
@@ -13,6 +13,8 @@ from flatland.util import (
     lazy_property,
     )
 from .base import Element
+from .flat import ScalarNode, decode_flat
+from .paths import ScalarSteps
 
 
 __all__ = (
@@ -67,6 +69,7 @@ class Scalar(Element):
         contain ``unicode(value)`` or ``u''`` for none.
 
         """
+        self._mark_dirty()
         try:
             # adapt and normalize the value, if possible
             value = self.value = self.adapt(value)
@@ -118,11 +121,12 @@ class Scalar(Element):
     def _index(self, name):
         raise IndexError(name)
 
+    _path_steps = ScalarSteps
+
+    _flat_node = ScalarNode
+
     def _set_flat(self, pairs, sep):
-        for key, value in pairs:
-            if key == self.name:
-                self.set(value)
-                break
+        decode_flat(self, pairs, sep, ScalarNode)
 
     def set_default(self):
         default = self.default_value
@@ -383,6 +387,8 @@ class Constrained(Scalar):
     child_type = String
     """TODO: doc"""
 
+    _clone_safe = True
+
     def __init__(self, value=Unspecified, **kw):
         Scalar.__init__(self, **kw)
         self.child_schema = self.child_type()
@@ -436,6 +442,8 @@ class Enum(Constrained):
 
     """
 
+    _clone_safe = True
+
     def __init__(self, value=Unspecified, **kw):
         Constrained.__init__(self, **kw)
         if value is not Unspecified:
@@ -570,6 +578,12 @@ class Ref(Scalar):
     def target(self):
         return self.root.el(self.target_path)
 
+    def _clone(self, parent):
+        clone = Scalar._clone(self, parent)
+        # the resolved target belongs to the original's tree
+        clone.__dict__.pop('target', None)
+        return clone
+
     def _get_u(self):
         """The Unicode representation of the reference target."""
         return self.target.u
@@ -578,6 +592,7 @@ class Ref(Scalar):
         if self.writable == 'ignore':
             return
         elif self.writable:
+            self.target._mark_dirty()
             self.target.u = ustr
         else:
             raise TypeError(u'Ref "%s" is not writable.' % self.name)
@@ -593,6 +608,7 @@ class Ref(Scalar):
         if self.writable == 'ignore':
             return
         elif self.writable:
+            self.target._mark_dirty()
             self.target.value = value
         else:
             raise TypeError(u'Ref "%s" is not writable.' % self.name)
@@ -29,6 +29,38 @@ def search_ancestry(element, predicate):
             pass
 
 
+def cached_i18n_function(element, name):
+    """Find the i18n helper *name*, such as ``'ugettext'``, for *element*.
+
+    Like :func:`find_i18n_function` with ``operator.attrgetter(name)``,
+    but the search of the element's ancestry is memoized on each element it
+    visits, and sibling elements share their parent's answer.  An
+    element's memo is discarded when it or one of its ancestors is
+    re-parented, renamed or assigned an i18n helper; helpers assigned
+    directly to schema classes after their elements have been searched go
+    unnoticed.  The fallback to ``__builtin__`` is not memoized.
+
+    """
+    transformer = _search_i18n(element, name)
+    if transformer:
+        return transformer
+    return getattr(__builtin__, name, None)
+
+
+def _search_i18n(element, name):
+    memo = element._structural_memo()
+    try:
+        return memo['i18n', name]
+    except KeyError:
+        pass
+    transformer = getattr(element, name, None)
+    if not transformer:
+        parent = element.parent
+        transformer = _search_i18n(parent, name) if parent is not None else None
+    memo['i18n', name] = transformer
+    return transformer
+
+
 def find_i18n_function(element, finder):
     """Find i18n form helpers such as ``ugettext``.
 
@@ -1,4 +1,4 @@
-from flatland.util import signal
+from flatland.util import signal, suspended
 
 
 validator_validated = signal('validator_validated', doc="""\
@@ -13,4 +13,38 @@ Emitted after a validator has processed an element.
 
 :param result: the result of validator execution
 
+Not emitted on threads running inside :func:`batched` or
+:func:`suspended`.
+
+""")
+
+validation_completed = signal('validation_completed', doc="""\
+Emitted once after :meth:`~flatland.schema.base.Element.validate` has run.
+
+:param sender: the element that was validated
+
+:param state: the *state* passed to
+  :meth:`~flatland.schema.base.Element.validate`
+
+:param result: the return value of
+  :meth:`~flatland.schema.base.Element.validate`
+
+:param events: a list of ``(validator, element, result)`` tuples, one for
+  each validator run, in the order they ran.  These are the events
+  :attr:`validator_validated` reports one at a time.
+
+Events are collected only while this signal has receivers.
+
 """)
+
+def batched():
+    """Suppress :attr:`validator_validated` on this thread for the block.
+
+    Validation events are still delivered in bulk to receivers of
+    :attr:`validation_completed`::
+
+      with batched():
+          form.validate()
+
+    """
+    return validator_validated.muted()
@@ -32,5 +32,6 @@ deferred_module.shadow(
         'signals': (
             'Signal',
             'signal',
+            'suspended',
             ),
       })
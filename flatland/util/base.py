@@ -115,6 +115,10 @@ class class_cloner(object):
     The class_cloner is only visible at the class level.  Instance access is
     proxied to the instance dictionary.
 
+    Each copy records how it was made in its ``_cloned_by`` attribute, a
+    tuple of ``(cls, method name, args, kwargs)``, allowing anonymous copies
+    to be identified and rebuilt elsewhere.
+
     """
 
     def __init__(self, fn):
@@ -135,7 +139,14 @@ class class_cloner(object):
         except (AttributeError, KeyError, TypeError):  # pragma: nocover
             members['__module__'] = cls.__module__
         clone = type(cls.__name__, (cls,), members)
-        return self.cloner.__get__(None, clone)
+        cloner, name = self.cloner.__get__(None, clone), self.name
+
+        def clone_with(*args, **kw):
+            clone._cloned_by = (cls, name, args, kw)
+            return cloner(*args, **kw)
+        clone_with.__name__ = name
+        clone_with.__doc__ = self.__doc__
+        return clone_with
 
     def __set__(self, instance, value):
         instance.__dict__[self.name] = value
@@ -10,6 +10,7 @@ signals.
 
 """
 from collections import defaultdict
+from contextlib import contextmanager
 import weakref
 from . base import symbol, threading
 from . import weakrefs
@@ -18,6 +19,23 @@ from . import weakrefs
 ANY = symbol('ANY')
 ANY_ID = 0
 
+
+class _Everything(object):
+    """Contains every signal; the muted set while :func:`suspended`."""
+
+    def __contains__(self, item):
+        return True
+
+EVERYTHING = _Everything()
+
+
+class _LocalState(threading.local):
+    #: the signals muted on this thread
+    muted = frozenset()
+
+local_state = _LocalState()
+
+
 class Signal(object):
     """A generic notification emitter."""
 
@@ -31,6 +49,9 @@ class Signal(object):
         self._by_receiver = defaultdict(set)
         self._by_sender = defaultdict(set)
         self._weak_senders = {}
+        # sender_id -> tuple of (receiver or weakref, weak); replaced
+        # wholesale whenever the connections change
+        self._receiver_cache = {}
 
     def connect(self, receiver, sender=ANY, weak=True):
         """Connect *receiver* to signal events send by *sender*.
@@ -61,6 +82,7 @@ class Signal(object):
         self.receivers.setdefault(receiver_id, receiver_ref)
         self._by_sender[sender_id].add(receiver_id)
         self._by_receiver[receiver_id].add(sender_id)
+        self._receiver_cache = {}
         del receiver_ref
 
         if sender is not ANY and sender_id not in self._weak_senders:
@@ -93,11 +115,26 @@ class Signal(object):
         value. The ordering of receiver notification is undefined.
 
         """
-        if not self.receivers:
+        if not self.receivers or self in local_state.muted:
             return []
-        else:
-            return [(receiver, receiver(sender=sender, **kwargs))
-                    for receiver in self.receivers_for(sender)]
+        results = []
+        for receiver, weak in self._cached_receivers(sender):
+            if weak:
+                receiver = self._dereference(receiver)
+                if receiver is None:
+                    continue
+            results.append((receiver, receiver(sender=sender, **kwargs)))
+        return results
+
+    def muted(self):
+        """Return a context manager that silences this signal.
+
+        While the block runs, :meth:`send` notifies no receivers on the
+        current thread, including receivers connected during the block.
+        Sends from other threads are unaffected.
+
+        """
+        return _muting(self)
 
     def has_receivers_for(self, sender):
         """True if there is probably a receiver for *sender*.
@@ -118,24 +155,54 @@ class Signal(object):
     def receivers_for(self, sender):
         """Iterate all live receivers listening for *sender*."""
         if self.receivers:
-            sender_id = _hashable_identity(sender)
-            if sender_id in self._by_sender:
-                ids = (self._by_sender[ANY_ID] |
-                       self._by_sender[sender_id])
-            else:
-                ids = self._by_sender[ANY_ID].copy()
-            for receiver_id in ids:
-                receiver = self.receivers.get(receiver_id)
-                if receiver is None:
-                    continue
-                if isinstance(receiver, weakrefs.WeakTypes):
-                    strong = receiver()
-                    if strong is None:
-                        self._disconnect(receiver_id, ANY_ID)
+            for receiver, weak in self._cached_receivers(sender):
+                if weak:
+                    receiver = self._dereference(receiver)
+                    if receiver is None:
                         continue
-                    receiver = strong
                 yield receiver
 
+    def _cached_receivers(self, sender):
+        """Return ``(receiver, weak)`` pairs listening for *sender*.
+
+        The tuple is computed once per sender and reused until a receiver
+        is connected or disconnected.  Senders without receivers of their
+        own share the tuple of ``ANY`` receivers.
+
+        """
+        cache = self._receiver_cache
+        by_sender = self._by_sender
+        if len(by_sender) > 1 or (by_sender and ANY_ID not in by_sender):
+            sender_id = _hashable_identity(sender)
+            if sender_id not in by_sender:
+                sender_id = ANY_ID
+        else:
+            # no receivers are connected to specific senders
+            sender_id = ANY_ID
+        try:
+            return cache[sender_id]
+        except KeyError:
+            pass
+        ids = by_sender.get(ANY_ID, set())
+        if sender_id != ANY_ID:
+            ids = ids | by_sender[sender_id]
+        entries = []
+        for receiver_id in ids:
+            receiver = self.receivers.get(receiver_id)
+            if receiver is not None:
+                entries.append(
+                    (receiver, isinstance(receiver, weakrefs.WeakTypes)))
+        # a concurrent (dis)connect replaces the cache; this result then
+        # lands in the discarded dict and is never served
+        cache[sender_id] = entries = tuple(entries)
+        return entries
+
+    def _dereference(self, receiver_ref):
+        receiver = receiver_ref()
+        if receiver is None:
+            self._disconnect(receiver_ref.receiver_id, ANY_ID)
+        return receiver
+
     def disconnect(self, receiver, sender=ANY):
         """Disconnect *receiver* from this signal's events."""
         sender_id = ANY_ID if sender is ANY else _hashable_identity(sender)
@@ -150,6 +217,7 @@ class Signal(object):
             self.receivers.pop(receiver_id, None)
         else:
             self._by_sender[sender_id].discard(receiver_id)
+        self._receiver_cache = {}
 
     def _cleanup_receiver(self, receiver_ref):
         """Disconnect a receiver from all senders."""
@@ -162,6 +230,7 @@ class Signal(object):
         self._weak_senders.pop(sender_id, None)
         for receiver_id in self._by_sender.pop(sender_id, ()):
             self._by_receiver[receiver_id].discard(sender_id)
+        self._receiver_cache = {}
 
     def _clear_state(self):
         """Throw away all signal state.  Useful for unit tests."""
@@ -169,6 +238,7 @@ class Signal(object):
         self.receivers.clear()
         self._by_sender.clear()
         self._by_receiver.clear()
+        self._receiver_cache = {}
 
 
 receiver_connected = Signal()
@@ -208,6 +278,24 @@ class Namespace(object):
 
 signal = Namespace().signal
 
+
+def suspended():
+    """Return a context manager that silences all signals on this thread."""
+    return _muting(EVERYTHING)
+
+
+@contextmanager
+def _muting(signal):
+    previous = local_state.muted
+    if signal is EVERYTHING:
+        local_state.muted = EVERYTHING
+    elif signal not in previous:
+        local_state.muted = previous | frozenset([signal])
+    try:
+        yield
+    finally:
+        local_state.muted = previous
+
 def _hashable_identity(obj):
     if hasattr(obj, 'im_func'):
         return (id(obj.im_func), id(obj.im_self))
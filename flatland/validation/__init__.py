@@ -1,5 +1,5 @@
 """Data validation tools."""
-from base import Validator, as_format_mapping
+from base import ValidationMessage, Validator, as_format_mapping
 from scalars import (
     Converted,
     IsFalse,
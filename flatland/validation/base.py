@@ -1,18 +1,22 @@
 """Base functionality for fancy validation."""
-from operator import attrgetter
-
-from flatland.schema.util import find_i18n_function
+from flatland.schema.util import cached_i18n_function
 
 
 N_ = lambda translatable: translatable
 P_ = lambda *translatable: translatable
-_ugettext_finder = attrgetter('ugettext')
-_ungettext_finder = attrgetter('ungettext')
 
 
 class Validator(object):
     """Base class for fancy validators."""
 
+    defer_messages = False
+    """If true, record messages as :class:`ValidationMessage` instances.
+
+    By default :meth:`note_error` and :meth:`note_warning` translate and
+    format messages immediately.  Deferred messages are formatted only when
+    first read, skipping the work for messages that never are.
+    """
+
     def __init__(self, **kw):
         """Construct a validator.
 
@@ -106,8 +110,12 @@ class Validator(object):
         """
         message = message or getattr(self, key)
         if message:
-            element.add_error(
-                self.expand_message(element, state, message, **info))
+            if self.defer_messages:
+                element.add_error(
+                    ValidationMessage(self, element, state, key, message, info))
+            else:
+                element.add_error(
+                    self.expand_message(element, state, message, **info))
         return False
 
     def note_warning(self, element, state, key=None, message=None, **info):
@@ -142,8 +150,12 @@ class Validator(object):
         """
         message = message or getattr(self, key)
         if message:
-            element.add_warning(
-                self.expand_message(element, state, message, **info))
+            if self.defer_messages:
+                element.add_warning(
+                    ValidationMessage(self, element, state, key, message, info))
+            else:
+                element.add_warning(
+                    self.expand_message(element, state, message, **info))
         return False
 
     def find_transformer(self, type, element, state, message):
@@ -188,13 +200,9 @@ class Validator(object):
             except KeyError:
                 pass
 
-        if type == 'ugettext':
-            finder = _ugettext_finder
-        elif type == 'ungettext':
-            finder = _ungettext_finder
-        else:
+        if type != 'ugettext' and type != 'ungettext':
             raise RuntimeError("Unknown transformation %r" % type)
-        return find_i18n_function(element, finder)
+        return cached_i18n_function(element, type)
 
     def expand_message(self, element, state, message, **extra_format_args):
         """Apply formatting to a validation message.
@@ -260,6 +268,95 @@ class Validator(object):
         return message % format_map
 
 
+class ValidationMessage(object):
+    """A validation message, expanded when first read.
+
+    Recorded in :attr:`~flatland.schema.base.Element.errors` and
+    :attr:`~flatland.schema.base.Element.warnings` by validators with
+    :attr:`~Validator.defer_messages` set.  The message is expanded by
+    :meth:`Validator.expand_message` on first use as text: when converted
+    with ``unicode()``, compared with a string, hashed or pickled.
+
+    Two deferred messages are equal if they were noted by the same
+    validator on the same element with the same message and format
+    arguments, without expanding either.
+
+    .. attribute:: validator
+
+      The :class:`Validator` that noted the message.
+
+    .. attribute:: element
+
+      The element the message was noted on.
+
+    .. attribute:: key
+
+      The name of the validator attribute holding the message, or None if
+      the message was given directly.
+
+    .. attribute:: message
+
+      The unexpanded message: a string, 3-tuple or callable.
+
+    .. attribute:: info
+
+      A dict of the extra format arguments given to
+      :meth:`Validator.note_error`.
+
+    """
+
+    __slots__ = ('validator', 'element', 'state', 'key', 'message', 'info',
+                 '_text')
+
+    def __init__(self, validator, element, state, key, message, info):
+        self.validator = validator
+        self.element = element
+        self.state = state
+        self.key = key
+        self.message = message
+        self.info = info
+        self._text = None
+
+    def format(self):
+        """Return the expanded message text."""
+        text = self._text
+        if text is None:
+            text = self._text = self.validator.expand_message(
+                self.element, self.state, self.message, **self.info)
+        return text
+
+    def __unicode__(self):
+        return unicode(self.format())
+
+    def __str__(self):
+        return str(self.format())
+
+    def __repr__(self):
+        return repr(self.format())
+
+    def __eq__(self, other):
+        if isinstance(other, ValidationMessage):
+            return (self.validator is other.validator and
+                    self.element is other.element and
+                    self.state is other.state and
+                    self.message == other.message and
+                    self.info == other.info)
+        if isinstance(other, basestring):
+            return self.format() == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(self.format())
+
+    def __reduce__(self):
+        # elements and validators stay behind; the text travels
+        return unicode, (self.format(),)
+
+
 class as_format_mapping(object):
     """A unified, optionally transformed, mapping view over multiple instances.
 
@@ -1,6 +1,7 @@
 # -*- coding: utf-8; fill-column: 78 -*-
 import operator
 from ..schema import Slot
+from ..schema.base import current_validation_run
 from . base import N_, P_, Validator
 
 
@@ -81,6 +82,8 @@ class NotDuplicated(Validator):
 
     comparator = operator.eq
 
+    key = None
+
     def validate(self, element, state):
         if element.parent is None:
             raise TypeError(
@@ -91,19 +94,65 @@ class NotDuplicated(Validator):
         container = element.parent
         if isinstance(container, Slot):
             container = container.parent
+        key = self.key
+        if key is None and self.comparator is operator.eq:
+            key = _value_key
+        if key is None:
+            valid, position = self._compare(container, element,
+                                            self.comparator)
+        else:
+            valid, position = self._lookup(container, element, key)
+        if not valid:
+            return self.note_error(
+                element, state, 'failure',
+                position=position, container_label=container.label)
+        return True
+
+    def _compare(self, container, element, op):
         valid, position = True, 0
-        op = self.comparator
         for idx, sibling in enumerate(container.children):
             if sibling is element:
                 position = idx + 1
                 break
             if valid and op(element, sibling):
                 valid = False
-        if not valid:
-            return self.note_error(
-                element, state, 'failure',
-                position=position, container_label=container.label)
-        return True
+        return valid, position
+
+    def _lookup(self, container, element, key):
+        run = current_validation_run()
+        cached = container.__dict__.get('_sibling_indexes')
+        if cached is None or cached[0] != run:
+            cached = (run, {})
+            if run is not None:
+                container.__dict__['_sibling_indexes'] = cached
+        index = cached[1].get(self)
+        if index is None or id(element) not in index:
+            index = cached[1][self] = _index_siblings(container, key)
+        position, valid = index[id(element)]
+        if valid is None:
+            # an unhashable key
+            valid, position = self._compare(
+                container, element, lambda a, b: key(a) == key(b))
+        return valid, position
+
+
+def _value_key(element):
+    return element.value, element.u
+
+
+def _index_siblings(container, key):
+    """Map id(member) to (position, unique or None if unhashable)."""
+    index, seen = {}, set()
+    for idx, sibling in enumerate(container.children):
+        try:
+            value = key(sibling)
+            unique = value not in seen
+        except TypeError:
+            unique = None
+        else:
+            seen.add(value)
+        index[id(sibling)] = (idx + 1, unique)
+    return index
 
 
 class HasAtLeast(Validator):
@@ -110,3 +110,44 @@ def test_stack_plain_push_pop():
     assert ctx[needle] == initial_value
 
     assert_raises(RuntimeError, ctx.pop)
+
+
+def test_nested_scopes():
+    ctx = Context()
+    known = sorted(_default_context.keys())
+    first, second = known[0], known[1]
+    initial = ctx[first], ctx[second]
+
+    ctx.push(**{first.encode('ascii'): 1})
+    ctx.push()
+    ctx[second] = 2
+    ctx[second] = 3
+    ctx.push(**{first.encode('ascii'): 4})
+    assert (ctx[first], ctx[second]) == (4, 3)
+    ctx.pop()
+    assert (ctx[first], ctx[second]) == (1, 3)
+    ctx.pop()
+    assert (ctx[first], ctx[second]) == (1, initial[1])
+    ctx.pop()
+    assert (ctx[first], ctx[second]) == initial
+
+    # writes to the base frame are permanent
+    ctx[first] = 5
+    ctx.push()
+    ctx.pop()
+    assert ctx[first] == 5
+
+
+def test_snapshot():
+    ctx = Context()
+    keys = tuple(sorted(_default_context.keys())[:2])
+    snapshot = ctx._snapshot(keys)
+    assert snapshot == (ctx[keys[0]], ctx[keys[1]])
+    assert ctx._snapshot(keys) is snapshot
+
+    ctx.push()
+    ctx[keys[1]] = Nothing
+    assert ctx._snapshot(keys) == (ctx[keys[0]], Nothing)
+    ctx.pop()
+    assert ctx._snapshot(keys) == snapshot
+    assert_raises(KeyError, ctx._snapshot, (u'xyzzy',))
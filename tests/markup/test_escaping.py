@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from flatland.out.generic import Markup, _markup_escape
+from flatland.out.markup import (
+    _attribute_escape,
+    _attribute_sort_key,
+    _unicode_keyed,
+    )
+
+from tests._util import eq_
+
+
+def test_attribute_escape():
+    eq_(_attribute_escape(u''), u'')
+    eq_(_attribute_escape(None), u'')
+    clean = u'form_address_street \xe9'
+    assert _attribute_escape(clean) is clean
+    eq_(_attribute_escape(u'<a href="x">&amp;</a>'),
+        u'&lt;a href=&quot;x&quot;&gt;&amp;amp;&lt;/a&gt;')
+    eq_(_attribute_escape(Markup(u'<b>')), u'<b>')
+    eq_(_attribute_escape('a"b'), u'a&quot;b')
+
+
+def test_markup_escape():
+    clean = u'plain "text"'
+    assert _markup_escape(clean) is clean
+    eq_(_markup_escape(u'<a href="x">&</a>'),
+        u'&lt;a href="x"&gt;&amp;&lt;/a&gt;')
+    eq_(_markup_escape(Markup(u'<b>')), u'<b>')
+
+
+def test_attribute_order():
+    pairs = [(u'value', 1), (u'id', 2), (u'type', 3), (u'class', 4),
+             (u'name', 5)]
+    eq_([name for name, _ in sorted(pairs, key=_attribute_sort_key)],
+        [u'type', u'name', u'value', u'class', u'id'])
+
+
+def test_unicode_keyed():
+    got = _unicode_keyed({'class_': 1, 'name': 2})
+    eq_(got, {u'class': 1, u'name': 2})
+    assert all(type(key) is unicode for key in got)
+    eq_(_unicode_keyed({'class_': 3}), {u'class': 3})
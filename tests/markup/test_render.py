@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+from StringIO import StringIO
+
+from flatland import Boolean, Dict, Integer, List, String
+from flatland.out.generic import Markup
+from flatland.out.markup import Generator
+
+from tests._util import eq_
+
+
+schema = Dict.named(u'form').of(
+    String.named(u'name'),
+    Boolean.named(u'admin'),
+    List.named(u'tags').of(String.named(u'tag')),
+    Dict.named(u'address').of(String.named(u'street'),
+                              Integer.named(u'zip')))
+
+
+def element():
+    return schema({u'name': u'<b>', u'admin': True,
+                   u'tags': [u'a', u'b'],
+                   u'address': {u'street': u'Main', u'zip': 12345}})
+
+
+def test_default_widgets():
+    gen = Generator('html')
+    got = gen.render(element())
+    assert isinstance(got, Markup)
+    eq_(got, u''.join([
+        u'<input type="text" name="form_name" value="&lt;b&gt;">',
+        u'<input type="checkbox" name="form_admin" value="1" '
+        u'checked="checked">',
+        u'<input type="text" name="form_tags_0_tag" value="a">',
+        u'<input type="text" name="form_tags_1_tag" value="b">',
+        u'<input type="text" name="form_address_street" value="Main">',
+        u'<input type="text" name="form_address_zip" value="12345">',
+        ]))
+
+
+def test_matches_single_tags():
+    el = element()
+    gen = Generator('xhtml', auto_domid=True, auto_tabindex=True,
+                    tabindex=1)
+    widgets = {String: u'textarea', Integer: (u'input', {u'type': u'text'}),
+               Boolean: None, List: None, Dict: None}
+    got = gen.render(el, widgets)
+
+    gen = Generator('xhtml', auto_domid=True, auto_tabindex=True,
+                    tabindex=1)
+    expected = [gen.textarea(el[u'name']),
+                gen.textarea(el[u'tags'][0]),
+                gen.textarea(el[u'tags'][1]),
+                gen.textarea(el[u'address'][u'street']),
+                gen.input(el[u'address'][u'zip'], type=u'text')]
+    eq_(got, u''.join(expected))
+    eq_(gen[u'tabindex'], 6)
+
+
+def test_widget_map():
+    def address(gen, el):
+        return u'<p>%s</p>' % el[u'street'].u
+
+    widgets = {
+        Dict: (u'fieldset', {u'class': u'group'}),
+        List: None,
+        u'form_tags_1_tag': u'textarea',
+        u'form_address': address,
+        String: (u'input', {u'type': u'text'}),
+        }
+    gen = Generator('xhtml')
+    stream = StringIO()
+    assert gen.render(element(), widgets, stream) is None
+    eq_(stream.getvalue(), u''.join([
+        u'<fieldset class="group">',
+        u'<input type="text" name="form_name" value="&lt;b&gt;" />',
+        u'<input type="text" name="form_tags_0_tag" value="a" />',
+        u'<textarea name="form_tags_1_tag">b</textarea>',
+        u'<p>Main</p>',
+        u'</fieldset>',
+        ]))
+
+
+def test_stream():
+    el = element()
+    widgets = {Dict: u'fieldset', List: None,
+               String: (u'input', {u'type': u'text'})}
+    expected = Generator('xhtml').render(el, widgets)
+
+    chunks = list(Generator('xhtml').stream(el, widgets, chunk_size=1))
+    eq_(len(chunks), 8)
+    assert all(isinstance(chunk, Markup) for chunk in chunks)
+    eq_(u''.join(chunks), expected)
+
+    chunks = list(Generator('xhtml').stream(el, widgets, encoding='utf-8',
+                                            chunk_size=100))
+    assert all(type(chunk) is str for chunk in chunks)
+    eq_(len(chunks), 3)
+    eq_(''.join(chunks).decode('utf-8'), expected)
+
+
+def test_stream_is_lazy():
+    rendered = []
+
+    def widget(gen, el):
+        rendered.append(el.name)
+        return u'<%s>' % el.name
+
+    el = element()
+    chunks = Generator().stream(el, {String: widget, Integer: widget,
+                                     Boolean: widget, Dict: None,
+                                     List: None}, chunk_size=1)
+    eq_(chunks.next(), u'<name>')
+    eq_(rendered, [u'name'])
+    eq_(list(chunks)[-1], u'<zip>')
+    eq_(len(rendered), 6)
@@ -3,6 +3,8 @@ from flatland import Array, Boolean, Integer
 from flatland.out import generic
 from flatland.out.generic import Context
 
+from tests._util import eq_
+
 
 Unspecified = object()
 Unique = object()
@@ -730,3 +732,58 @@ def test_filter_want():
     expected = {}
     assert_bound_transform(generic.transform_filters,
                            u'horse', given, expected, context=context)
+
+
+def test_compiled_pipeline():
+    def full(tagname, given, context, bind):
+        attributes = given.copy()
+        contents = None
+        for fn in generic._transforms:
+            contents = fn(tagname, attributes, contents, context, bind)
+        return attributes, contents
+
+    def compiled(tagname, given, context, bind):
+        attributes = given.copy()
+        contents = generic.transform(tagname, attributes, None, context, bind)
+        return attributes, contents
+
+    context = Context()
+    context.push(auto_domid=u'on', auto_tabindex=True, tabindex=-1,
+                 auto_filter=True, filters=[lambda *args: u'filtered'])
+    el = schema(123)
+    for tagname in u'input', u'label', u'textarea', u'div':
+        for given in ({}, {u'auto_name': False}, {u'auto_for': u'on'},
+                      {u'auto_domid': u'off', u'name': u'x'}):
+            eq_(compiled(tagname, given, context, el),
+                full(tagname, given, context, el))
+            eq_(compiled(tagname, given, context, None),
+                full(tagname, given, context, None))
+
+    # unhashable settings are compiled, but not cached
+    class Switch(list):
+        def __unicode__(self):
+            return u'on'
+    context[u'auto_filter'] = Switch()
+    eq_(generic.transform(u'div', {}, None, context, el), u'filtered')
+
+
+def test_pipeline_follows_new_transformers():
+    context = Context()
+    el = schema(123)
+    attributes = {}
+    generic.transform(u'input', attributes, None, context, el)
+    assert u'class' not in attributes
+
+    def transform_class(tagname, attributes, contents, context, bind):
+        attributes[u'class'] = u'c'
+        return contents
+
+    generic.transformer(u'class', (u'input',))(transform_class)
+    try:
+        attributes = {}
+        generic.transform(u'input', attributes, None, context, el)
+        eq_(attributes[u'class'], u'c')
+    finally:
+        generic._transforms.remove(transform_class)
+        del generic._auto_tags[u'class']
+        generic._pipelines.clear()
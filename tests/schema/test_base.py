@@ -239,3 +239,217 @@ def test_default_value():
     # a default_factory may reference el.default
     el = Element(default='mno', default_factory=lambda x: x.default)
     assert el.default_value == 'mno'
+
+
+def test_clone():
+    from flatland import Dict, List, String, Integer
+
+    schema = Dict.named(u'd').of(
+        String.named(u's'),
+        List.named(u'l').of(Integer.named(u'i')))
+    el = schema({u's': u'abc', u'l': [1, 2]})
+    el[u's'].add_error(u'bad')
+    el.validate()
+
+    clone = el.clone()
+    assert clone is not el
+    assert type(clone) is type(el)
+    assert clone.parent is None
+    eq_(clone.value, el.value)
+    eq_(clone.valid, el.valid)
+    eq_(clone[u's'].errors, [u'bad'])
+    assert clone[u's'].errors is not el[u's'].errors
+    assert clone[u's'].parent is clone
+    assert clone[u'l'][1].parent.parent is clone[u'l']
+    eq_(clone[u'l'][1].fq_name(), u'.l.1')
+
+    clone[u's'].set(u'xyz')
+    clone[u'l'].append(3)
+    eq_(el.value, {u's': u'abc', u'l': [1, 2]})
+    eq_(clone.value, {u's': u'xyz', u'l': [1, 2, 3]})
+
+
+def test_structural_names_follow_reparenting():
+    from flatland import Dict, String
+
+    schema = Dict.named(u'd').of(String.named(u's'))
+    el, other = schema(), schema.named(u'e')()
+    leaf = el[u's']
+    eq_(leaf.flattened_name(), u'd_s')
+    eq_(leaf.fq_name(), u'.s')
+    assert leaf.root is el
+    eq_(list(leaf.path), [el, leaf])
+
+    leaf.parent = other
+    eq_(leaf.flattened_name(), u'e_s')
+    assert leaf.root is other
+
+    other.name = u'f'
+    eq_(leaf.flattened_name(), u'f_s')
+    eq_(leaf.flattened_name(u'.'), u'f.s')
+
+    leaf.parent = None
+    eq_(leaf.flattened_name(), u's')
+    eq_(leaf.fq_name(), u'.')
+    assert leaf.root is leaf
+
+
+def test_structural_memos_are_per_tree():
+    from flatland import Dict, List, String
+
+    schema = Dict.named(u'd').of(List.named(u'l').of(String.named(u's')))
+    el, other = schema({u'l': [u'x']}), schema({u'l': [u'y']})
+    leaf = el[u'l'][0]
+    eq_(leaf.fq_name(), u'.l.0')
+    memo = leaf._structural_memo()
+
+    other[u'l'].append(u'z')
+    other[u'l'][0].name = u'renamed'
+    del other[u'l'][0]
+    assert leaf._structural_memo() is memo
+
+    el.name = u'e'
+    assert leaf._structural_memo() is not memo
+    eq_(leaf.flattened_name(), u'e_l_0_s')
+
+
+def test_structural_memos_release_removed_members():
+    from flatland import List, String
+
+    el = List.named(u'l').of(String.named(u's'))()
+    dependents = el._structural_memo()['dependents']
+    removals = [lambda: el.set([u'c']),
+                lambda: el.__delitem__(0),
+                lambda: el.remove(u'b'),
+                lambda: el.__delitem__(slice(None))]
+    for remove in removals:
+        el.set([u'a', u'b'])
+        eq_([child.fq_name() for child in el], [u'.0', u'.1'])
+        remove()
+        eq_(len(dependents), 0)
+        eq_([child.fq_name() for child in el],
+            [u'.%d' % i for i in range(len(el))])
+        eq_(len(dependents), len(el))
+
+
+def test_names_on_classes_and_instances():
+    from flatland import String
+
+    class Declared(String):
+        name = u'declared'
+
+    eq_(Declared.name, u'declared')
+    eq_(Declared().name, u'declared')
+    eq_(Declared(name=u'own').name, u'own')
+    eq_(Declared.named(u'other').name, u'other')
+    eq_(Declared.using(name=u'used')().name, u'used')
+    eq_(Declared.name, u'declared')
+    assert 'name' not in vars(Declared)
+
+
+def test_incremental_validation():
+    from flatland import Dict, List, String
+
+    calls = []
+
+    def recorder(label, result=True):
+        def validator(element, state):
+            calls.append(label)
+            return result
+        return validator
+
+    schema = Dict.named(u'd').using(validators=[recorder(u'd')]).of(
+        String.named(u'a').using(validators=[recorder(u'a')]),
+        String.named(u'b').using(validators=[recorder(u'b')]),
+        List.named(u'l').using(validators=[recorder(u'l')]).of(
+            String.named(u'x').using(validators=[recorder(u'x')])))
+    el = schema({u'a': u'1', u'b': u'2', u'l': [u'3']})
+
+    # never validated: everything runs
+    assert el.validate(incremental=True)
+    eq_(sorted(calls), [u'a', u'b', u'd', u'l', u'x'])
+
+    del calls[:]
+    assert el.validate(incremental=True)
+    eq_(calls, [])
+
+    el[u'b'].set(u'22')
+    assert el.validate(incremental=True)
+    eq_(calls, [u'b', u'd'])
+
+    del calls[:]
+    el[u'l'].append(u'4')
+    assert el.validate(incremental=True)
+    eq_(calls, [u'x', u'l', u'd'])
+
+    del calls[:]
+    el[u'l'].pop()
+    assert el.validate(incremental=True)
+    eq_(calls, [u'l', u'd'])
+
+    # a clean, invalid branch still fails an incremental validation
+    el[u'a'].validators = [recorder(u'a', False)]
+    el[u'a'].set(u'x')
+    assert not el.validate(incremental=True)
+    assert not el[u'a'].valid
+    del calls[:]
+    el[u'b'].set(u'2')
+    assert not el.validate(incremental=True)
+    eq_(calls, [u'b', u'd'])
+    assert not el.validate()
+
+    # changes are tracked from one incremental validation to the next,
+    # whatever full validations ran in between
+    el[u'a'].validators = [recorder(u'a')]
+    el[u'a'].set(u'1')
+    assert el.validate()
+    del calls[:]
+    assert el.validate(incremental=True)
+    eq_(calls, [u'a', u'd'])
+    del calls[:]
+    assert el.validate(incremental=True)
+    eq_(calls, [])
+
+
+def test_validate_many():
+    from flatland import Dict, Integer, String
+    from flatland.validation import Converted, Present
+
+    schema = Dict.of(String.named(u'name').using(validators=[Present()]),
+                     Integer.named(u'age').using(validators=[Converted()]))
+    rows = [{u'name': u'a', u'age': u'1'},
+            {u'name': u'', u'age': u'x'},
+            {u'name': u'c', u'age': u'3'}]
+    results = list(schema.validate_many(rows))
+    eq_([(index, valid) for index, valid, errors in results],
+        [(0, True), (1, False), (2, True)])
+    eq_(results[0][2], {})
+    eq_(results[2][2], {})
+    eq_(sorted(results[1][2]), [u'age', u'name'])
+
+    for row, (index, valid, errors) in zip(rows, results):
+        el = schema(row)
+        eq_(el.validate(), valid)
+        eq_(errors, dict((child.name, child.errors)
+                         for child in el.children if child.errors))
+
+
+def test_compact_instances():
+    from flatland import String
+
+    el = String(u'abc')
+    eq_(sorted(el.__dict__), [u'u', u'value'])
+    assert el.parent is None
+    assert el.valid is Unevaluated
+
+    eq_(el.warnings, [])
+    el.add_error(u'bad')
+    el.add_error(u'bad')
+    eq_(el.errors, [u'bad'])
+    assert el.clone().errors is not el.errors
+    eq_(el.clone().errors, [u'bad'])
+
+    el = String(validators=[], errors=[u'given'], optional=True)
+    eq_(el.errors, [u'given'])
+    eq_(el.validators, [])
+    assert el.optional
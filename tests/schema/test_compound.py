@@ -488,6 +488,13 @@ def test_joined_string_flat():
         assert from_flat.value == from_set.value
 
 
+def test_joined_string_nested_flat():
+    schema = Dict.of(JoinedString.named(u'js').of(Integer))
+    el = schema({u'js': [1, 2]})
+    eq_(el.flatten(), [(u'js', u'1,2')])
+    eq_(schema.from_flat(el.flatten()).value, el.value)
+
+
 def test_joined_string_regex():
     schema = JoinedString.using(separator=u', ',
                                 separator_regex=re.compile('X*,X*'))
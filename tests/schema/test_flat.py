@@ -0,0 +1,249 @@
+from flatland import (
+    DateYYYYMMDD,
+    Dict,
+    ElementBuilder,
+    Form,
+    Integer,
+    List,
+    SparseDict,
+    String,
+    )
+from flatland.schema.flat import (
+    MappingNode,
+    OpaqueNode,
+    flat_node,
+    urlencoded,
+    write_urlencoded,
+    )
+
+from tests._util import assert_raises, eq_
+
+
+def test_nested_round_trip():
+    class Profile(Form):
+        name = String
+        contact = Dict.of(String.named(u'email'),
+                          List.named(u'phones').of(
+                              Dict.of(String.named(u'kind'),
+                                      String.named(u'number'))))
+
+    pairs = [(u'name', u'Obed'),
+             (u'contact_email', u'obed@example.com'),
+             (u'contact_phones_0_kind', u'home'),
+             (u'contact_phones_0_number', u'555-1212'),
+             (u'contact_phones_1_kind', u'work'),
+             (u'contact_phones_1_number', u'555-1313')]
+    el = Profile.from_flat(pairs)
+    eq_(el[u'contact'][u'phones'].value,
+        [{u'kind': u'home', u'number': u'555-1212'},
+         {u'kind': u'work', u'number': u'555-1313'}])
+    eq_(sorted(el.flatten()), sorted(pairs))
+
+
+def test_field_names_containing_sep():
+    schema = Dict.of(String.named(u'a'),
+                     String.named(u'a_b'),
+                     Dict.named(u'a_c').of(String.named(u'd_e')))
+    el = schema.from_flat([(u'a', u'1'), (u'a_b', u'2'), (u'a_c_d_e', u'3'),
+                           (u'a_c', u'bogus'), (u'a_b_c', u'bogus')])
+    eq_(el.value, {u'a': u'1', u'a_b': u'2', u'a_c': {u'd_e': u'3'}})
+
+
+def test_first_pair_wins():
+    schema = Dict.of(String.named(u'x'))
+    el = schema.from_flat([(u'x', u'first'), (u'x', u'second')])
+    eq_(el[u'x'].value, u'first')
+
+
+def test_alternate_sep():
+    schema = Dict.named(u'd').of(List.named(u'l').of(Integer.named(u'i')))
+    el = schema()
+    el.set_flat([(u'd.l.0.i', u'1'), (u'd.l.1.i', u'2')], sep=u'.')
+    eq_(el.value, {u'l': [1, 2]})
+
+
+def test_sparse_children_are_parented():
+    schema = SparseDict.of(String.named(u'x'), String.named(u'y'))
+    el = schema.from_flat([(u'x', u'abc')])
+    eq_(el.keys(), [u'x'])
+    assert el[u'x'].parent is el
+
+
+def test_instance_name_override():
+    schema = Dict.of(String.named(u'x'))
+    el = schema(name=u'renamed')
+    el.set_flat([(u'renamed_x', u'abc')])
+    eq_(el[u'x'].value, u'abc')
+
+
+def test_custom_set_flat_is_honored():
+    seen = []
+
+    class Custom(String):
+        def _set_flat(self, pairs, sep):
+            seen.extend(pairs)
+            self.set(u'custom')
+
+    schema = Dict.of(Custom.named(u'c'), String.named(u'x'))
+    el = schema.from_flat([(u'c', u'1'), (u'c_sub', u'2'), (u'x', u'3')])
+    eq_(el.value, {u'c': u'custom', u'x': u'3'})
+    eq_(seen, [(u'c', u'1'), (u'c_sub', u'2')])
+    assert isinstance(flat_node(Custom.named(u'c'), u'_'), OpaqueNode)
+
+
+def test_custom_set_flat_delegating_to_base():
+    seen = []
+
+    class Custom(Dict):
+        def _set_flat(self, pairs, sep):
+            pairs = list(pairs)
+            seen.extend(pairs)
+            Dict._set_flat(self, pairs, sep)
+
+    schema = Custom.named(u'c').of(String.named(u'x'))
+    el = schema.from_flat([(u'c_x', u'1')])
+    eq_(el.value, {u'x': u'1'})
+    eq_(seen, [(u'c_x', u'1')])
+
+    del seen[:]
+    outer = Dict.named(u'o').of(schema)
+    el = outer.from_flat([(u'o_c_x', u'2')])
+    eq_(el.value, {u'c': {u'x': u'2'}})
+    eq_(seen, [(u'c_x', u'2')])
+
+
+def test_list_limit_without_pruning():
+    schema = List.named(u'l').using(prune_empty=False,
+                                    maximum_set_flat_members=3).of(
+        String.named(u's'))
+    el = schema.from_flat([(u'l_5_s', u'x'), (u'l_0_s', u'a'),
+                           (u'l_1_s', u'b'), (u'l_2_s', u'c')])
+    eq_(el.value, [u'a', u'b', u'c'])
+
+    el = schema.from_flat([(u'l_5_s', u'x'), (u'l_0_s', u'a')])
+    eq_(el.value, [u'a', None, None])
+
+
+def test_nodes_are_cached_per_class():
+    schema = Dict.of(String.named(u'x'))
+    node = flat_node(schema, u'_')
+    assert isinstance(node, MappingNode)
+    assert flat_node(schema, u'_') is node
+    assert flat_node(schema(), u'_') is node
+    assert flat_node(schema, u'.') is not node
+    assert flat_node(schema.named(u'y'), u'_') is not node
+
+
+def test_iterflatten_schema_order():
+    schema = Dict.named(u'd').of(String.named(u'z'),
+                                 List.named(u'l').of(Integer.named(u'i')),
+                                 String.named(u'a'))
+    el = schema({u'z': u'1', u'l': [2, 3], u'a': u'4'})
+    pairs = el.iterflatten()
+    assert not isinstance(pairs, list)
+    eq_(list(pairs), [(u'd_z', u'1'), (u'd_l_0_i', u'2'),
+                      (u'd_l_1_i', u'3'), (u'd_a', u'4')])
+    eq_(el.flatten(), list(el.iterflatten()))
+    eq_(el[u'l'].flatten(sep=u'.'), [(u'd.l.0.i', u'2'), (u'd.l.1.i', u'3')])
+
+
+def test_urlencoded():
+    from StringIO import StringIO
+
+    schema = List.named(u'rows').of(
+        Dict.of(String.named(u'n a'), Integer.named(u'x\xe9')))
+    el = schema([{u'n a': u'a&b=c', u'x\xe9': 1},
+                 {u'n a': u'', u'x\xe9': 2}])
+    expected = ('rows_0_n+a=a%26b%3Dc&rows_0_x%C3%A9=1&'
+                'rows_1_n+a=&rows_1_x%C3%A9=2')
+    eq_(''.join(urlencoded(el)), expected)
+
+    chunks = list(urlencoded(el, chunk_size=1))
+    eq_(len(chunks), 4)
+    eq_(''.join(chunks), expected)
+
+    stream = StringIO()
+    write_urlencoded(el[1], stream, sep=u'.', encoding='latin-1')
+    eq_(stream.getvalue(), 'rows.1.n+a=&rows.1.x%E9=2')
+
+
+def test_builder_matches_set_flat():
+    schema = Dict.named(u'd').of(
+        String.named(u's'),
+        List.named(u'l').of(Integer.named(u'i')),
+        DateYYYYMMDD.named(u'date'))
+    pairs = [(u'd_l_1_i', u'2'), (u'd_s', u'abc'), (None, u'x'),
+             (u'd_date_year', u'2010'), (u'd_l_0_i', u'1'),
+             (u'd_date_month', u'1'), (u'd_date_day', u'31')]
+
+    el = schema()
+    builder = ElementBuilder(el)
+    for key, value in pairs:
+        builder.feed(key, value)
+    # lists are populated when the builder closes
+    eq_(el[u'l'].value, [])
+    assert builder.close() is el
+    eq_(el.value, schema.from_flat(pairs).value)
+    eq_(el[u'l'].value, [1, 2])
+
+    assert_raises(RuntimeError, builder.feed, u'd_s', u'xyz')
+    assert builder.close() is el
+
+
+def test_builder_keeps_unnamed_fields():
+    schema = Dict.named(u'd').of(String.named(u'a'), String.named(u'b'),
+                                 List.named(u'l').of(String.named(u's')))
+    el = schema({u'a': u'old', u'b': u'old', u'l': [u'old']})
+    builder = ElementBuilder(el)
+    builder.feed(u'd_a', u'new')
+    builder.close()
+    eq_(el.value, {u'a': u'new', u'b': u'old', u'l': [u'old']})
+
+    builder = ElementBuilder(el)
+    builder.feed(u'd_l_1_s', u'new')
+    builder.close()
+    eq_(el.value, {u'a': u'new', u'b': u'old', u'l': [u'new']})
+
+
+def test_builder_releases_dropped_members():
+    schema = List.named(u'l').using(maximum_set_flat_members=3).of(
+        Dict.named(u'd').of(String.named(u's'),
+                            List.named(u'n').of(String.named(u't'))))
+    el = schema()
+    builder = ElementBuilder(el)
+    for index in xrange(1000, -1, -1):
+        builder.feed(u'l_%d_d_s' % index, u's%d' % index)
+        builder.feed(u'l_%d_d_n_0_t' % index, u't%d' % index)
+    # only the 3 members kept hold assigned scalars and pending lists
+    decoding = builder._decoding
+    eq_(len(decoding.assigned), 6)
+    eq_(len(decoding.pending), 4)
+    builder.close()
+    eq_(el.value, [{u's': u's%d' % i, u'n': [u't%d' % i]}
+                   for i in range(3)])
+
+
+def test_builder_custom_root():
+    schema = DateYYYYMMDD.named(u'date')
+    el = schema()
+    builder = ElementBuilder(el, sep=u'.')
+    builder.extend([(u'date.year', u'2010'), (u'date.month', u'1')])
+    builder.feed(u'date.day', u'31')
+    builder.close()
+    eq_(el.u, u'2010-01-31')
+
+    seen = []
+
+    class Custom(String):
+        def _set_flat(self, pairs, sep):
+            seen.append(pairs)
+
+    builder = ElementBuilder(Custom.named(u'c')())
+    builder.feed(u'c_sub', u'1')
+    builder.feed(u'other', u'2')
+    eq_(seen, [])
+    builder.close()
+    eq_(seen, [[(u'c_sub', u'1'), (u'other', u'2')]])
+
+    ElementBuilder(Custom()).close()
+    eq_(seen[-1], [])
@@ -147,3 +147,58 @@ def test_inheritance_diamond():
 
     assert len(BA4.field_schema) == 3
     assert isinstance(BA4()['ab_member'], String)
+
+
+def test_defaults_from_prototype():
+    from flatland import Dict, List
+    from flatland.schema.plan import schema_plan
+
+    class Schema(Form):
+        x = String.using(default=u'abc')
+        y = Dict.of(Integer.named(u'z').using(default=5))
+        l = List.of(String).using(default=2)
+
+    el1, el2 = Schema.from_defaults(), Schema.from_defaults()
+    prototype = schema_plan(Schema).defaults_prototype
+    assert el1 is not el2
+    assert prototype is not el1 and prototype is not el2
+    assert el1['y'] is not el2['y']
+    assert el1['y'].parent is el1
+    eq_(el1.value, dict(x=u'abc', y=dict(z=5), l=[None, None]))
+    el1['y']['z'].set(10)
+    eq_(el2['y']['z'].value, 5)
+    eq_(Schema.from_defaults().value['y'], dict(z=5))
+
+    # the prototype never takes a parent, even when the schema is nested
+    outer = Dict.of(Schema.named(u's')).from_defaults()
+    assert outer[u's'].parent is outer
+    assert prototype.parent is None
+    assert prototype['y'].parent is prototype
+    assert schema_plan(Schema).defaults_prototype is prototype
+
+
+def test_prototype_skips_factories_and_custom_init():
+    counter = []
+
+    def next_value(element):
+        counter.append(1)
+        return len(counter)
+
+    class Factory(Form):
+        x = Integer.using(default_factory=next_value)
+
+    eq_(Factory.from_defaults()['x'].value, 1)
+    eq_(Factory.from_defaults()['x'].value, 2)
+
+    class Custom(String):
+        def __init__(self, value=None, **kw):
+            String.__init__(self, **kw)
+            counter.append(self)
+
+    class Holder(Form):
+        c = Custom
+
+    del counter[:]
+    Holder.from_defaults()
+    Holder.from_defaults()
+    eq_(len(counter), 2)
@@ -426,3 +426,19 @@ def test_value():
     schema = List.of(String)
     el = schema([u'x', u'x'])
     eq_(el.value, [u'x', u'x'])
+
+
+def test_names_follow_renumbering():
+    schema = List.named(u'l').of(String.named(u's'))
+    el = schema([u'x', u'y'])
+    y = el[1]
+    eq_(y.flattened_name(), u'l_1_s')
+    eq_(y.fq_name(), u'.1')
+
+    el.insert(0, u'w')
+    eq_(y.flattened_name(), u'l_2_s')
+    eq_(y.fq_name(), u'.2')
+
+    del el[0:2]
+    eq_(y.flattened_name(), u'l_0_s')
+    eq_(el.flatten(), [(u'l_0_s', u'y')])
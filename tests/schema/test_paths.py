@@ -6,16 +6,23 @@ from flatland import (
     Integer,
     Form,
     List,
+    SparseDict,
     )
 from flatland.schema.paths import (
+    BoundPath,
+    DESCEND,
+    ExpressionCache,
+    GLOB,
     NAME,
+    PathExpression,
     SLICE,
     TOP,
     UP,
+    expression_cache,
     pathexpr,
     tokenize,
     )
-from tests._util import assert_raises
+from tests._util import assert_raises, eq_
 
 
 def _tokenizes_as(path, expected):
@@ -240,3 +247,217 @@ def test_find_single_messaging():
     message = _find_message(el, 'a1[:]', single=True)
     expected = "Path 'a1[:]' matched multiple elements"
     assert expected in message
+
+
+def test_expression_cache():
+    cache = ExpressionCache(max_size=2)
+    a = cache.get(u'a')
+    assert cache.get(u'a') is a
+    cache.get(u'b')
+    cache.get(u'a')
+    cache.get(u'c')
+    assert u'a' in cache and u'b' not in cache
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 3, 1)
+
+    pinned = cache.pin(u'p')
+    cache.get(u'd')
+    cache.get(u'e')
+    assert cache.get(u'p') is pinned
+    assert len(cache) == 3
+
+    cache.max_size = 0
+    assert len(cache) == 1
+    assert cache.get(u'x') is not cache.get(u'x')
+
+    cache.unpin(u'p')
+    assert u'p' not in cache
+    cache.clear()
+    assert (cache.hits, cache.misses, cache.evictions) == (0, 0, 0)
+
+
+def test_pathexpr_pin():
+    expr = pathexpr(u'/l1[0]', pin=True)
+    assert isinstance(expr, PathExpression)
+    assert pathexpr(u'/l1[0]') is expr
+    assert pathexpr(expr) is expr
+    assert expression_cache.pin(u'/l1[0]') is expr
+
+    el = Schema.from_defaults()
+    assert el.find(expr) == el.find(u'/l1[0]')
+    expression_cache.unpin(u'/l1[0]')
+
+
+def test_bind():
+    bound = pathexpr(u'l2[:]/l2i1').bind(Schema)
+    assert isinstance(bound, BoundPath)
+    el = Schema.from_defaults()
+    assert [e.value for e in bound(el)] == [4, 4, 4]
+    assert bound(el[u'l2']) == []
+
+    assert pathexpr(u'/d1/d1i2').bind(Schema)(el[u'l1'][0])[0].value == 2
+    assert pathexpr(u'a1[1:3]').bind(Schema)(el) == el[u'a1'][1:3]
+    assert pathexpr(u'l3[1][0]').bind(Schema)(el) == [el[u'l3'][1][0]]
+    assert pathexpr(u'..').bind(Schema)(el[u'd1'][u'd1i1']) == [el[u'd1']]
+
+    assert_raises(LookupError, pathexpr(u'd1/bogus').bind, Schema)
+    assert_raises(LookupError, pathexpr(u'l1[x]').bind, Schema)
+    assert_raises(LookupError, pathexpr(u'i1/x').bind, Schema)
+    bound = pathexpr(u'd1/bogus').bind(Schema, strict=False)
+    assert bound(el) == []
+    assert_raises(LookupError, bound, el, strict=True)
+
+
+def test_bind_follows_instances():
+    schema = Dict.of(Integer.named(u'x'))
+    bound = pathexpr(u'y').bind(schema, strict=False)
+    el = schema(field_schema=[Integer.named(u'y')])
+    el.set({u'y': 1})
+    assert [e.value for e in bound(el)] == [1]
+
+    class Custom(Dict):
+        def _index(self, name):
+            return self[u'x']
+
+    el = Custom.of(Integer.named(u'x'))({u'x': 2})
+    assert [e.value for e in el.find(u'anything')] == [2]
+    assert el.el(u'anything').value == 2
+
+
+def test_bindings_do_not_outlive_schema():
+    import gc, weakref
+
+    expr = pathexpr(u'x')
+    schema = Dict.named(u'transient').of(Integer.named(u'x'))
+    eq_(len(expr(schema({u'x': 1}))), 1)
+    ref = weakref.ref(schema)
+    del schema
+    gc.collect()
+    assert ref() is None
+
+
+def test_bindings_are_bounded():
+    from flatland.schema import paths
+    from flatland.schema.plan import schema_plan
+
+    el = Dict.of(Integer.named(u'x'))({u'x': 1})
+    bound_paths = schema_plan(type(el)).bound_paths
+    saved, paths.max_cache_size = paths.max_cache_size, 4
+    try:
+        for i in xrange(20):
+            eq_(el.find(u'y%d' % i, strict=False), [])
+            assert len(bound_paths) <= 4
+    finally:
+        paths.max_cache_size = saved
+
+    # a recompiled expression reuses the binding of the one it replaces
+    expr = PathExpression(u'x')
+    eq_(expr(el), [el[u'x']])
+    bound = bound_paths[expr._key]
+    eq_(PathExpression(u'x')(el), [el[u'x']])
+    assert bound_paths[expr._key] is bound
+
+
+def test_indexed_lookups():
+    schema = Schema.using(indexed=True)
+    el = schema.from_defaults()
+    member = el[u'l3'][1]
+
+    assert el.el(u'd1.d1i2') is el[u'd1'][u'd1i2']
+    assert el.el(u'd1.d1i2') is el[u'd1'][u'd1i2']
+    assert member.el(u'1') is member[1]
+    assert member.el(u'.l3.1.0') is member[0]
+    assert el.find(u'l2/2/l2i2', single=True) is el[u'l2'][2][u'l2i2']
+    assert el.el(u'a1.0') is el[u'a1'][0]
+    assert_raises(KeyError, el.el, u'd1.bogus')
+    assert_raises(KeyError, el.el, u'd1.bogus')
+    assert_raises(LookupError, el.find, u'l1/5')
+
+    # the index follows changes to the shape of the tree
+    del el[u'l3'][0]
+    assert member.el(u'.l3.0.1') is member[1]
+    assert_raises(KeyError, el.el, u'l3.1')
+    d1i1 = el.el(u'd1.d1i1')
+    el[u'd1'].set({u'd1i1': 5, u'd1i2': 6})
+    assert el.el(u'd1.d1i1') is not d1i1
+    eq_(el.el(u'd1.d1i1').value, 5)
+
+    el[u'l3'].append(None)
+    assert el.el(u'l3.1') is el[u'l3'][1]
+    el[u'd1'][u'd1i1'].name = u'renamed'
+    assert not el._element_index
+
+    # changes elsewhere leave the index alone
+    el.el(u'd1.d1i2')
+    index = el._element_index
+    assert index
+    other = schema.from_defaults()
+    other[u'l3'].append(None)
+    del other[u'l3'][0]
+    assert index and el._element_index is index
+
+    sparse = SparseDict.using(indexed=True).of(Integer.named(u'x'))({u'x': 1})
+    assert sparse.el(u'x').value == 1
+    del sparse[u'x']
+    assert_raises(KeyError, sparse.el, u'x')
+
+
+def test_tokenize_globs():
+    glob = lambda x: (GLOB, x)
+    descend = (DESCEND, None)
+    _tokencases = [
+        ('*', [glob('*')]),
+        ('foo/*/baz', [name('foo'), glob('*'), name('baz')]),
+        ('sneep/_*/squiznart', [name('sneep'), glob('_*'),
+                                name('squiznart')]),
+        ('a?c', [glob('a?c')]),
+        (r'a\*', [name('a*')]),
+        (r'\**', [glob('[*]*')]),
+        (r'x\[?', [glob('x[[]?')]),
+        ('**', [descend]),
+        ('/**/x', [top, descend, name('x')]),
+        ('**/..', [descend, up]),
+        ('*/..', []),
+        ]
+    for path, expected in _tokencases:
+        yield _tokenizes_as, path, expected
+
+
+def test_glob_evaluation():
+    el = Schema.from_defaults()
+    today = date.today()
+
+    _finders = [
+        (el, 'd1/*', [1, 2]),
+        (el, 'd1/*2', [2]),
+        (el, '*1/d1i?', [1, 2]),
+        (el, 'l1/*', [3, 3]),
+        (el, 'l2/*/l2i2', [5, 5, 5]),
+        (el, 'l3/1/*', [6, 6]),
+        (el, 'dt1/*', [today.year, today.month, today.day]),
+        (el, 'i1/*', []),
+        (el, 'd1/**', [{'d1i1': 1, 'd1i2': 2}, 1, 2]),
+        (el, '**/d1i2', [2]),
+        (el, '/l2/**/l2i1', [4, 4, 4]),
+        (el, 'd1/**/../d1i1', [1, 1]),
+        ]
+    for element, path, expected in _finders:
+        yield _finds_loosely, element, path, expected
+
+
+def _finds_loosely(el, path, expected):
+    found = [e.value for e in el.find(path, strict=False)]
+    eq_(found, expected)
+    eq_([e.value for e in el.find_iter(path, strict=False)], found)
+
+
+def test_find_iter_is_lazy():
+    el = Schema.from_defaults()
+    matches = el.find_iter(u'**')
+    assert matches.next() is el
+    assert matches.next() is el[u'i1']
+
+    # strict failures are raised as they are reached
+    matches = el.find_iter(u'l3/*/missing')
+    assert_raises(LookupError, next, matches)
+    matches = el.find_iter(u'd1/d1i1')
+    eq_(list(matches), [el[u'd1'][u'd1i1']])
@@ -0,0 +1,100 @@
+from flatland import (
+    Compound,
+    Dict,
+    Integer,
+    String,
+    )
+from flatland.schema.plan import discard_plan, schema_plan
+
+from tests._util import eq_
+
+
+def test_plan_cached_per_class():
+    schema = String.named(u'x')
+    plan = schema_plan(schema)
+    assert schema_plan(schema) is plan
+    assert plan.schema is schema
+
+    clone = schema.using(optional=True)
+    assert schema_plan(clone) is not plan
+    assert schema_plan(clone).schema is clone
+
+
+def test_plan_fields():
+    schema = Dict.of(String.named(u'x'), Integer.named(u'y'))
+    plan = schema_plan(schema)
+    eq_(sorted(plan.fields), [u'x', u'y'])
+    assert schema.field_schema_mapping is plan.fields
+    assert schema().field_schema_mapping is plan.fields
+    assert schema()._field_schema_for(u'y') is plan.fields[u'y']
+    assert schema()._field_schema_for(u'z') is None
+
+
+def test_plan_instance_field_override():
+    schema = Dict.of(String.named(u'x'))
+    el = schema(field_schema=[Integer.named(u'y')])
+    eq_(el.field_schema_mapping.keys(), [u'y'])
+
+
+def test_plan_validators():
+    ok = lambda el, state: True
+    nope = lambda el, state: False
+
+    schema = String.using(validators=[ok])
+    schema_plan(schema)
+    assert schema(u'abc').validate()
+    assert not schema(u'abc', validators=[nope]).validate()
+
+
+def test_plan_validators_reassigned():
+    class S(String):
+        validators = []
+
+    assert not S().validate()
+    S.validators = [lambda el, state: False]
+    assert not S(u'x').validate()
+    S.validators = [lambda el, state: True]
+    assert S(u'x').validate()
+
+
+def test_plan_follows_reconfigured_classes():
+    schema = Dict.named(u's').of(String.named(u'b'))
+    outer = Dict.named(u'o').of(schema)
+    eq_(schema.from_flat([(u's_b', u'1')]).value, {u'b': u'1'})
+    eq_(outer.from_flat([(u'o_s_b', u'2')]).value, {u's': {u'b': u'2'}})
+    plan = schema_plan(schema)
+
+    schema.name = u'z'
+    assert schema_plan(schema) is not plan
+    eq_(schema.from_flat([(u'z_b', u'1')]).value, {u'b': u'1'})
+    eq_(outer.from_flat([(u'o_z_b', u'2')]).value, {u'z': {u'b': u'2'}})
+
+    schema.field_schema = [String.named(u'b'), Integer.named(u'c')]
+    eq_(schema.from_flat([(u'z_c', u'3')]).value, {u'b': None, u'c': 3})
+
+    defaulted = String.using(default=u'a')
+    eq_(defaulted.from_defaults().value, u'a')
+    defaulted.default = u'b'
+    eq_(defaulted.from_defaults().value, u'b')
+
+    # classes configured before any plan could see them keep all plans
+    plan = schema_plan(outer)
+    String.named(u'x').using(optional=True)
+    assert schema_plan(outer) is plan
+
+
+def test_plan_discarded_by_compound_init():
+    class Pair(Compound):
+        field_schema = [String.named(u'a')]
+
+        def __compound_init__(cls):
+            if len(cls.field_schema) == 1:
+                cls.field_schema = cls.field_schema + [String.named(u'b')]
+
+        def compose(self):
+            return u'', None
+
+    Pair()
+    eq_(sorted(schema_plan(Pair).fields), [u'a', u'b'])
+    discard_plan(Pair)
+    assert '_schema_plan' not in Pair.__dict__
@@ -0,0 +1,54 @@
+from __future__ import with_statement
+import pickle
+
+from flatland import Dict, Integer, List, String
+from flatland.bulk import Pipeline, SchemaReference
+from flatland.validation import Converted, Present
+
+from tests._util import assert_raises, eq_
+
+
+Record = Dict.named(u'record').of(
+    String.named(u'name').using(validators=[Present()]),
+    Integer.named(u'age').using(validators=[Converted()]),
+    List.named(u'tags').of(String.named(u'tag')))
+
+
+def test_reference_rebuilds_clones():
+    schema = pickle.loads(pickle.dumps(SchemaReference(Record))).resolve()
+    assert schema is not Record
+    eq_(schema.name, u'record')
+    eq_([field.name for field in schema.field_schema],
+        [u'name', u'age', u'tags'])
+    eq_(schema.field_schema[2].member_schema.name, u'tag')
+
+    el = schema({u'name': u'', u'age': u'x', u'tags': [u'a']})
+    assert not el.validate()
+    eq_(el.value, {u'name': u'', u'age': None, u'tags': [u'a']})
+
+    assert SchemaReference(Dict).resolve() is Dict
+
+
+def test_reference_requires_identity():
+    def make():
+        class Local(String):
+            pass
+        return Local
+
+    assert_raises(TypeError, SchemaReference, make())
+    assert_raises(TypeError, SchemaReference, List.of(make()))
+
+
+def test_pipeline():
+    rows = [{u'name': u'n%s' % i if i % 3 else u'', u'age': i}
+            for i in xrange(25)]
+    expected = list(Record.validate_many(rows))
+
+    pipeline = Pipeline(Record, processes=2, chunk_size=4, max_pending=2)
+    with pipeline:
+        eq_(list(pipeline.validate(rows)), expected)
+        eq_(sorted(pipeline.validate(iter(rows), ordered=False)), expected)
+
+        flat = [[(u'record_name', u'x'), (u'record_age', u'y')]]
+        eq_(list(pipeline.validate(flat, flat=True)),
+            [(0, False, {u'record_age': [u'age is not correct.']})])
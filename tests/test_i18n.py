@@ -145,3 +145,27 @@ def test_tuple_plural():
     data = schema(dict(name='xxx'))
     data.validate(catalog)
     assert data['name'].errors == [u'plural NAME 2']
+
+
+def test_cached_gettext_follows_changes():
+    from flatland.schema.util import cached_i18n_function
+
+    catalog = GetTextish()
+    schema = Dict.of(String.named('age').using(validators=[Converted()]))
+
+    data = schema()
+    data.validate()
+    assert data['age'].errors == [u'age is not correct.']
+    assert cached_i18n_function(data['age'], 'ugettext') is None
+
+    # assigned translators replace the memoized search results
+    data.ugettext = catalog.ugettext
+    assert cached_i18n_function(data['age'], 'ugettext') == catalog.ugettext
+    del data['age'].errors[:]
+    data.validate()
+    assert data['age'].errors == [u'reg AGE']
+
+    # as do moves to another tree
+    other = schema()
+    data['age'].parent = other
+    assert cached_i18n_function(data['age'], 'ugettext') is None
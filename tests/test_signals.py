@@ -1,3 +1,4 @@
+from __future__ import with_statement
 from flatland.util.signals import (
     ANY,
     ANY_ID,
@@ -5,7 +6,9 @@ from flatland.util.signals import (
     Namespace,
     Signal,
     receiver_connected,
+    suspended,
     )
+from flatland.util import threading
 
 from tests._util import eq_, assert_raises
 
@@ -166,6 +169,97 @@ def test_no_double_send():
     assert sentinel == [None, 123, None]
 
 
+def test_receiver_cache():
+    sentinel = []
+
+    def first(sender):
+        sentinel.append((1, sender))
+
+    def second(sender):
+        sentinel.append((2, sender))
+
+    class Object(object):
+        pass
+    obj = Object()
+
+    sig = Signal()
+    sig.connect(first)
+    sig.send(obj)
+    assert sig._cached_receivers(obj) is sig._cached_receivers(None)
+    eq_(sentinel, [(1, obj)])
+
+    del sentinel[:]
+    sig.connect(second, obj)
+    sig.send(obj)
+    sig.send(None)
+    eq_(sorted(sentinel), [(1, None), (1, obj), (2, obj)])
+
+    del sentinel[:]
+    sig.disconnect(first)
+    sig.send(obj)
+    eq_(sentinel, [(2, obj)])
+
+    del sentinel[:]
+    del second
+    sig.send(obj)
+    assert not sentinel
+    eq_(sig._cached_receivers(obj), ())
+
+    del sentinel[:]
+    sig.connect(first, obj)
+    del obj
+    eq_(sig._cached_receivers(None), ())
+
+
+def test_muted():
+    sentinel = []
+
+    def received(sender):
+        sentinel.append(sender)
+
+    sig, other = Signal(), Signal()
+    sig.connect(received)
+    other.connect(received)
+
+    def late(sender):
+        sentinel.append((u'late', sender))
+
+    with sig.muted():
+        sig.connect(late)
+        eq_(sig.send(1), [])
+        other.send(2)
+        with sig.muted():
+            sig.send(3)
+        sig.send(4)
+        with suspended():
+            other.send(5)
+            with other.muted():
+                other.send(6)
+        other.send(7)
+    sig.send(8)
+    eq_(sorted(sentinel), [2, 7, 8, (u'late', 8)])
+
+
+def test_muted_per_thread():
+    sentinel = []
+
+    def received(sender):
+        sentinel.append(sender)
+
+    sig = Signal()
+    sig.connect(received)
+
+    def send():
+        sig.send(u'thread')
+
+    with suspended():
+        sig.send(u'main')
+        thread = threading.Thread(target=send)
+        thread.start()
+        thread.join()
+    eq_(sentinel, [u'thread'])
+
+
 def test_has_receivers():
     received = lambda sender: None
 
@@ -98,3 +98,51 @@ def test_nested_validation():
 
     form.el('d2.x2').set(2)
     assert form.validate()
+
+
+def test_deferred_messages():
+    import pickle
+    from flatland.validation import ValidationMessage
+
+    expanded = []
+
+    class Counting(Age.ValidAge):
+        defer_messages = True
+
+        def expand_message(self, *args, **kw):
+            expanded.append(args)
+            return Age.ValidAge.expand_message(self, *args, **kw)
+
+    validator = Counting()
+    el = Age(0, name=u'age', validators=[validator])
+    assert not el.validate()
+    assert not el.validate()
+    assert len(el.errors) == 1
+    assert expanded == []
+
+    message = el.errors[0]
+    assert isinstance(message, ValidationMessage)
+    assert message.validator is validator
+    assert message.element is el
+    assert message.key == 'too_young'
+    assert message.message == validator.too_young
+
+    assert el.errors == [u'age must be at least 1.']
+    assert unicode(message) == u'age must be at least 1.'
+    assert len(expanded) == 1
+    assert hash(message) == hash(u'age must be at least 1.')
+    assert pickle.loads(pickle.dumps(message)) == u'age must be at least 1.'
+
+    el = Age(150, name=u'age', validators=[Counting()])
+    el.validate()
+    assert el.warnings == [u'age is at the maximum age.']
+
+
+def test_deferred_messages_validate_many():
+    schema = Dict.of(Age.named(u'age').using(
+        validators=[Age.ValidAge(defer_messages=True)]))
+    results = list(schema.validate_many([{u'age': 0}, {u'age': 5},
+                                         {u'age': 200}]))
+    assert [valid for _, valid, _ in results] == [False, True, False]
+    assert results[0][2] == {u'age': [u'age must be at least 1.']}
+    assert results[2][2] == {u'age': [u'age may not be larger than 150']}
@@ -259,3 +259,52 @@ def test_has_between_one_and_two():
     el = schema(['a', 'b', 'c'])
     assert not el.validate()
     assert el.errors == [u'outer must contain at least 1 and at most 2 inners']
+
+
+def test_no_duplicates_key():
+    schema = validated_string(
+        NotDuplicated(key=lambda element: element.value.lower()))
+    el = schema([u'a', u'B', u'b', u'A', u'c'])
+    assert not el.validate()
+    assert valid_of_children(el) == [True, True, False, False, True]
+    assert el[3].errors == [u'foo may not be repeated within test.']
+
+    # the index follows changes between runs
+    del el[2:4]
+    assert el.validate()
+
+
+def test_no_duplicates_unhashable():
+    schema = validated_string(
+        NotDuplicated(key=lambda element: [element.value]))
+    el = schema([u'a', u'b', u'a'])
+    assert not el.validate()
+    assert valid_of_children(el) == [True, True, False]
+
+
+def test_no_duplicates_many():
+    schema = List.named('test').of(Integer.using(
+        validators=[NotDuplicated(failure=u'%(position)s')]))
+    el = schema(range(2000) + [5, 1999])
+    assert not el.validate()
+    assert [e.errors for e in el.children if e.errors] == [[u'2001'],
+                                                           [u'2002']]
+
+
+def test_no_duplicates_outside_validate():
+    from flatland.schema.base import current_validation_run
+
+    validator = NotDuplicated()
+    schema = validated_string(validator)
+    el = schema([u'a', u'b'])
+    assert el.validate()
+    assert current_validation_run() is None
+    el[1].set(u'a')
+    assert not validator.validate(el[1], None)
+
+    el = schema([u'x', u'x'])
+    assert not el.validate()
+    el[1].set(u'y')
+    del el[1].errors[:]
+    assert validator.validate(el[1], None)
+    assert el[1].errors == []
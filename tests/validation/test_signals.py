@@ -1,4 +1,5 @@
-from flatland import String, signals
+from __future__ import with_statement
+from flatland import Dict, String, signals
 from flatland.schema.base import NotEmpty
 from flatland.validation import (
     Converted,
@@ -59,3 +60,57 @@ def test_validator_validated():
     assert not sentinel
 
     signals.validator_validated._clear_state()
+
+
+def test_validation_completed():
+    batches, single = [], []
+
+    def collector(sender, **kw):
+        batches.append((sender, kw))
+
+    def listener(**kw):
+        single.append(kw)
+
+    signals.validation_completed.connect(collector)
+    signals.validator_validated.connect(listener)
+
+    present, converted = Present(), Converted()
+    schema = Dict.of(String.named(u'x').using(validators=[present,
+                                                          converted]),
+                     String.named(u'y').using(optional=False))
+    el = schema({u'x': u'abc'})
+    assert not el.validate(state=1)
+    eq_(len(batches), 1)
+    sender, kw = batches[0]
+    assert sender is el
+    eq_(kw['state'], 1)
+    eq_(kw['result'], False)
+    eq_(kw['events'], [(present, el[u'x'], True),
+                        (converted, el[u'x'], True),
+                        (NotEmpty, el[u'y'], False),
+                        (NotEmpty, el, True)])
+    eq_(len(single), 4)
+
+    del batches[:], single[:]
+    with signals.batched():
+        el[u'x'].validate()
+        with signals.batched():
+            pass
+        el[u'x'].validate()
+    eq_(len(batches), 2)
+    eq_(len(batches[1][1]['events']), 2)
+    assert not single
+
+    el[u'x'].validate()
+    eq_(len(single), 2)
+
+    del batches[:], single[:]
+    with signals.suspended():
+        el.validate()
+    with signals.validation_completed.muted():
+        el.validate()
+    assert not batches
+    eq_(len(single), 4)
+
+    signals.validation_completed._clear_state()
+    signals.validator_validated._clear_state()